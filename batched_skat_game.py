@@ -0,0 +1,122 @@
+from typing import Optional
+
+import numpy as np
+
+from card import Card, INGAME_SUIT_TABLE, STICH_WINNER_TABLE
+from skat_game import PlayerParty
+
+_rewards = np.array([card.reward for card in Card.all()], dtype=np.int16)
+
+
+class BatchedSkatGame:
+    """
+    Plays many skat games in lockstep. Every game is represented by rows of NumPy arrays and every call to play_cards
+    plays one card in each game, so valid cards and stich winners are computed with vectorized operations.
+    Cards are referred to by their id (see Card.id).
+    """
+
+    def __init__(self, deals: np.ndarray, start_players: Optional[np.ndarray] = None):
+        """
+        :param deals: The card ids for each game (shape: games x 32). Cards 0-9, 10-19 and 20-29 are dealt to the
+        players 0, 1 and 2, cards 30 and 31 form the skat.
+        :param start_players: The player to play the first card in each game (default: player 0).
+        """
+        self.num_games = len(deals)
+        self._games = np.arange(self.num_games)
+        self.deals = np.asarray(deals)
+        # hands[game, player, card_id] is True if the player holds the card
+        self.hands = np.zeros((self.num_games, 3, 32), dtype=bool)
+        for player in range(3):
+            self.hands[self._games[:, None], player, self.deals[:, player * 10:(player + 1) * 10]] = True
+        self.skats = self.deals[:, 30:32].copy()
+
+        self.trumps: Optional[np.ndarray] = None
+        self.soloists: Optional[np.ndarray] = None
+        self.points = np.zeros((self.num_games, 2), dtype=np.int16)
+
+        self.start_players = np.zeros(self.num_games, dtype=np.int8) if start_players is None \
+            else np.asarray(start_players, dtype=np.int8)
+        self.current_players = self.start_players.copy()
+        # card ids of the current stich, only the first stich_size columns are valid
+        self.stiche = np.zeros((self.num_games, 3), dtype=np.int8)
+        self.stich_size = 0
+        self.cards_played = 0
+        self._leading_players = self.current_players.copy()
+
+    @classmethod
+    def random(cls, num_games: int, rand_gen: np.random.Generator) -> "BatchedSkatGame":
+        deals = np.argsort(rand_gen.random((num_games, 32)), axis=1)
+        return cls(deals, rand_gen.integers(0, 3, num_games))
+
+    def set_bid_results(self, trumps: np.ndarray, soloists: np.ndarray, skats: Optional[np.ndarray] = None):
+        """
+        :param trumps: The trump suit of each game.
+        :param soloists: The soloist of each game.
+        :param skats: The two card ids the soloist puts into the skat for each game (default: keep the dealt skat).
+        """
+        self.trumps = np.asarray(trumps, dtype=np.int8)
+        self.soloists = np.asarray(soloists, dtype=np.int8)
+        if skats is not None:
+            skats = np.asarray(skats)
+            solo_hands = self.hands[self._games, self.soloists]
+            solo_hands[self._games[:, None], self.skats] = True
+            assert solo_hands[self._games[:, None], skats].all()
+            solo_hands[self._games[:, None], skats] = False
+            self.hands[self._games, self.soloists] = solo_hands
+            self.skats = skats.copy()
+        self.points[:, PlayerParty.soloist] += _rewards[self.skats].sum(axis=1)
+
+    @property
+    def done(self) -> bool:
+        return self.cards_played == 30
+
+    @property
+    def current_hands(self) -> np.ndarray:
+        """:returns: The hand of the current player in each game (shape: games x 32)."""
+        return self.hands[self._games, self.current_players]
+
+    def valid_card_masks(self) -> np.ndarray:
+        """:returns: For each game and card id, if the current player may play the card (shape: games x 32)."""
+        hands = self.current_hands
+        if self.stich_size == 0:
+            return hands
+        ingame_suits = INGAME_SUIT_TABLE[self.trumps]
+        leading_suits = ingame_suits[self._games, self.stiche[:, 0]]
+        following = hands & (ingame_suits == leading_suits[:, None])
+        return np.where(following.any(axis=1)[:, None], following, hands)
+
+    def play_cards(self, card_ids: np.ndarray):
+        """Plays the given card id for the current player in each game."""
+        if self.done:
+            raise RuntimeError("Games are already over")
+        card_ids = np.asarray(card_ids)
+        if not self.valid_card_masks()[self._games, card_ids].all():
+            raise ValueError("Not all cards are valid")
+        self.hands[self._games, self.current_players, card_ids] = False
+        self.stiche[:, self.stich_size] = card_ids
+        self.stich_size += 1
+        self.cards_played += 1
+        if self.stich_size == 3:
+            self._finish_stiche()
+        else:
+            self.current_players = (self.current_players + 1) % 3
+
+    def _finish_stiche(self):
+        winning_cards = STICH_WINNER_TABLE[self.trumps, self.stiche[:, 0], self.stiche[:, 1], self.stiche[:, 2]]
+        winners = ((self._leading_players + winning_cards) % 3).astype(np.int8)
+        stich_values = _rewards[self.stiche].sum(axis=1)
+        winner_parties = np.where(winners == self.soloists, PlayerParty.soloist, PlayerParty.defenders)
+        np.add.at(self.points, (self._games, winner_parties), stich_values)
+        self.stich_size = 0
+        self.current_players = winners
+        self._leading_players = winners.copy()
+
+    def winning_parties(self) -> Optional[np.ndarray]:
+        if not self.done:
+            return None
+        return np.where(self.points[:, PlayerParty.soloist] > 60, PlayerParty.soloist, PlayerParty.defenders)
+
+
+def random_card_ids(valid_card_masks: np.ndarray, rand_gen: np.random.Generator) -> np.ndarray:
+    """:returns: A uniformly chosen valid card id for each game."""
+    return np.argmax(np.where(valid_card_masks, rand_gen.random(valid_card_masks.shape), -1), axis=1)
@@ -1,5 +1,7 @@
 from enum import IntEnum
-from typing import Optional
+from typing import Iterable, Optional
+
+import numpy as np
 
 
 class Suit(IntEnum):
@@ -35,30 +37,79 @@ class Rank(IntEnum):
 
 
 class Card:
+    """
+    A playing card. There is exactly one immutable instance per suit and rank: constructing a card returns the
+    interned instance, so cards can be compared by identity and are cheap to keep in large collections.
+    """
+    __slots__ = ("suit", "rank", "reward", "id", "mask")
+
     _rewards = [0, 0, 0, 10, 2, 3, 4, 11]
+    # all cards, indexed by id
+    _cards: tuple["Card", ...] = ()
+
+    def __new__(cls, suit: Suit, rank: Rank):
+        return cls._cards[suit * len(Rank) + rank]
+
+    @classmethod
+    def _create(cls, suit: Suit, rank: Rank) -> "Card":
+        card = object.__new__(cls)
+        object.__setattr__(card, "suit", suit)
+        object.__setattr__(card, "rank", rank)
+        object.__setattr__(card, "reward", cls._rewards[rank])
+        object.__setattr__(card, "id", suit * len(Rank) + rank)
+        # bit of this card in 32 bit card masks
+        object.__setattr__(card, "mask", 1 << card.id)
+        return card
 
-    def __init__(self, suit: Suit, rank: Rank):
-        self.suit = suit
-        self.rank = rank
-        self.reward = self._rewards[rank]
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __reduce__(self):
+        return Card, (self.suit, self.rank)
 
     def __repr__(self):
         return f"{self.suit} {self.rank}"
 
     def __hash__(self):
-        return self.suit * len(Rank) + self.rank
-
-    def __eq__(self, other: "Card"):
-        return self.suit == other.suit and self.rank == other.rank
+        return self.id
 
     @staticmethod
-    def all():
-        return (Card(suit, rank) for suit in Suit for rank in Rank)
+    def all() -> tuple["Card", ...]:
+        """:returns: All cards, ordered by id."""
+        return Card._cards
 
     @staticmethod
     def get_reward(card: "Card"):
         return card.reward
 
+    @staticmethod
+    def from_id(card_id: int) -> "Card":
+        return Card._cards[card_id]
+
+    @staticmethod
+    def mask_of(cards: Iterable["Card"]) -> int:
+        """:returns: The 32 bit mask with the bits of all given cards set."""
+        mask = 0
+        for card in cards:
+            mask |= card.mask
+        return mask
+
+    @staticmethod
+    def from_mask(mask: int) -> list["Card"]:
+        """:returns: The cards contained in the mask, ordered by id."""
+        cards = []
+        while mask:
+            lowest = mask & -mask
+            cards.append(Card.from_id(lowest.bit_length() - 1))
+            mask ^= lowest
+        return cards
+
+
+Card._cards = tuple(Card._create(suit, rank) for suit in Suit for rank in Rank)
+
 
 class CardInfo:
     _ranks_by_strength = (Rank.seven, Rank.eight, Rank.nine, Rank.queen, Rank.king, Rank.ten, Rank.ace)
@@ -74,43 +125,129 @@ class CardInfo:
 
     def __init__(self, trump: Suit):
         self.trump = trump
+        # precomputed lookups for this trump, see tables below
+        self._non_jacks = _non_jacks[trump]
+        self._cards = _cards[trump]
+        self._is_trump = _is_trump[trump]
+        self._ingame_suits = _ingame_suits[trump]
+        self._non_trump_suits = _non_trump_suits[trump]
+        self._strengths = _strengths[trump]
+        self._stich_winners = _stich_winners[trump]
+
+    @property
+    def suit_masks(self) -> list[int]:
+        """:returns: The card mask of each ingame suit, indexed by IngameSuit (the trump suit itself is empty)."""
+        return _suit_masks[self.trump]
 
     @staticmethod
-    def jacks():
+    def jacks() -> tuple[Card, ...]:
         """:returns: The jacks in ascending strength."""
-        return [Card(suit, Rank.jack) for suit in Suit]
+        return _jacks
 
-    def non_jacks(self, ingame_suit: IngameSuit) -> list[Card]:
+    def non_jacks(self, ingame_suit: IngameSuit) -> tuple[Card, ...]:
         """:returns: The non-jack cards of the given suit in ascending strength."""
-        suit = self.suit(ingame_suit)
-        return [Card(suit, rank) for rank in self._ranks_by_strength] if suit is not None else []
+        return self._non_jacks[ingame_suit]
 
-    def cards(self, ingame_suit: IngameSuit):
+    def cards(self, ingame_suit: IngameSuit) -> tuple[Card, ...]:
         """:returns: The cards of the given suit, sorted by ascending strength."""
-        cards = self.non_jacks(ingame_suit)
-        if ingame_suit == self.trump or ingame_suit == IngameSuit.trump:
-            cards.extend(self.jacks())
-        return cards
+        return self._cards[ingame_suit]
 
     def is_trump(self, card: Card):
-        return card.rank == Rank.jack or card.suit == self.trump
+        return self._is_trump[card.id]
 
     def ingame_suit(self, card: Card) -> IngameSuit:
-        return IngameSuit.trump if self.is_trump(card) else card.suit
+        return self._ingame_suits[card.id]
 
     def suit(self, ingame_suit: IngameSuit) -> Optional[Suit]:
         return self.trump if ingame_suit == IngameSuit.trump else Suit(ingame_suit)
 
-    def non_trump_suits(self):
-        return [suit for suit in IngameSuit if suit != self.trump and suit != IngameSuit.trump]
+    def non_trump_suits(self) -> tuple[IngameSuit, ...]:
+        return self._non_trump_suits
+
+    def strengths(self, leading_suit: Optional[IngameSuit]) -> list[int]:
+        """:returns: The ingame strength of each card, indexed by card id."""
+        # no card belongs to the ingame suit of the trump's suit, so it is equivalent to no leading suit
+        return self._strengths[self.trump if leading_suit is None else leading_suit]
 
     def ingame_strength(self, card: Optional[Card], leading_suit: IngameSuit):
         if card is None:
             return -1
-        strength = self.strength(card)
-        ingame_suit = self.ingame_suit(card)
-        if ingame_suit == IngameSuit.trump:
-            strength += 14
-        elif ingame_suit == leading_suit:
-            strength += 7
-        return strength
+        return self.strengths(leading_suit)[card.id]
+
+    def stich_winner(self, first: Card, second: Card, third: Card) -> int:
+        """:returns: The index of the card that wins a stich with the cards played in the given order."""
+        return self._stich_winners[(first.id * 32 + second.id) * 32 + third.id]
+
+
+# --- precomputed tables, indexed by trump (and ingame suit) and card id ---
+
+_jacks = tuple(Card(suit, Rank.jack) for suit in Suit)
+
+_non_jacks = [
+    [
+        tuple(Card(trump if ingame_suit == IngameSuit.trump else Suit(ingame_suit), rank)
+              for rank in CardInfo._ranks_by_strength)
+        for ingame_suit in IngameSuit
+    ]
+    for trump in Suit
+]
+
+_cards = [
+    [
+        non_jacks + _jacks if ingame_suit == trump or ingame_suit == IngameSuit.trump else non_jacks
+        for ingame_suit, non_jacks in zip(IngameSuit, _non_jacks[trump])
+    ]
+    for trump in Suit
+]
+
+_is_trump = [[card.rank == Rank.jack or card.suit == trump for card in Card.all()] for trump in Suit]
+
+_ingame_suits = [
+    [IngameSuit.trump if is_trump else IngameSuit(card.suit) for card, is_trump in zip(Card.all(), _is_trump[trump])]
+    for trump in Suit
+]
+
+_non_trump_suits = [
+    tuple(suit for suit in IngameSuit if suit != trump and suit != IngameSuit.trump) for trump in Suit
+]
+
+_suit_masks = [
+    [
+        Card.mask_of(card for card in Card.all() if _ingame_suits[trump][card.id] == ingame_suit)
+        for ingame_suit in IngameSuit
+    ]
+    for trump in Suit
+]
+
+# INGAME_SUIT_TABLE[trump, card_id] is the ingame suit of the card
+INGAME_SUIT_TABLE = np.array(_ingame_suits, dtype=np.int8)
+
+# STRENGTH_TABLE[trump, leading_suit, card_id] is the ingame strength of the card,
+# jacks and trumps get +14 and cards of the leading suit +7 on top of CardInfo.strength
+STRENGTH_TABLE = np.array([
+    [
+        [
+            CardInfo.strength(card) + (14 if ingame_suit == IngameSuit.trump else 7 if ingame_suit == leading_suit else 0)
+            for card, ingame_suit in zip(Card.all(), _ingame_suits[trump])
+        ]
+        for leading_suit in IngameSuit
+    ]
+    for trump in Suit
+], dtype=np.int8)
+
+
+def _stich_winner_table(trump: Suit) -> np.ndarray:
+    # strengths[first, card] is the strength of card in a stich led by first
+    strengths = STRENGTH_TABLE[trump][INGAME_SUIT_TABLE[trump]]
+    card_ids = np.arange(32)
+    stich_strengths = np.broadcast_arrays(
+        strengths[card_ids, card_ids][:, None, None], strengths[:, :, None], strengths[:, None, :])
+    return np.argmax(np.stack(stich_strengths), axis=0).astype(np.int8)
+
+
+# STICH_WINNER_TABLE[trump, first_id, second_id, third_id] is the index of the card that wins the stich
+STICH_WINNER_TABLE = np.stack([_stich_winner_table(trump) for trump in Suit])
+
+# plain list copies for fast scalar lookups
+_strengths = STRENGTH_TABLE.tolist()
+_stich_winners = STICH_WINNER_TABLE.reshape(len(Suit), -1).tolist()
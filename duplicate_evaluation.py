@@ -0,0 +1,114 @@
+import time
+from typing import Optional
+
+import players.trump_strategies
+from players import Player, get_player
+from game_results import read_rewards
+from game_summary import PairedSummary
+from result_cache import ResultCache
+from skat_deals import deal_bank
+from skat_statistics import log_stats
+
+
+def paired_summary(first_filenames: list[str], second_filenames: list[str]) -> PairedSummary:
+    """
+    Compares the soloists of two sets of statistics files of the same seed, one file for each seating of the defenders.
+    Only runs that are in all files are compared.
+    """
+    rewards = [dict(zip(*(column.tolist() for column in read_rewards(filename))))
+               for filename in first_filenames + second_filenames]
+    common_runs = sorted(set.intersection(*(set(run_rewards) for run_rewards in rewards)))
+    summary = PairedSummary()
+    for run in common_runs:
+        deal_rewards = [run_rewards[run] for run_rewards in rewards]
+        summary.add(deal_rewards[:len(first_filenames)], deal_rewards[len(first_filenames):])
+    return summary
+
+
+def duplicate_stats(
+        runs: int,
+        soloists: list[Player],
+        opponents: list[Player],
+        seed: int,
+        rotate_defenders=False,
+        directory: Optional[str] = None,
+        workers=1,
+        cache: Optional[ResultCache] = None,
+) -> list[list[str]]:
+    """
+    Plays the same deals with every soloist against the opponents, and with the opponents' seats swapped if
+    rotate_defenders is set.
+    :returns: The statistics files of each soloist, one for each seating of the opponents.
+    """
+    directory = f"{time.strftime('%Y%m%d-%H%M%S')}-duplicate" if directory is None else directory
+    seatings = [opponents, opponents[::-1]] if rotate_defenders else [opponents]
+    deals = deal_bank(seed, runs)
+    files = []
+    for soloist in soloists:
+        print(f"Simulating soloist {soloist} vs. {opponents[0]} and {opponents[1]}")
+        files.append([
+            log_stats(runs, runs / 10, soloist, seating, seed, log_file_prefix=f"duplicate-seating{i}",
+                      directory=directory, timestamp=False, deals=deals, workers=workers, cache=cache)
+            for i, seating in enumerate(seatings)
+        ])
+    return files
+
+
+def print_paired_comparison(names: list[str], files: list[list[str]]):
+    """Prints the paired differences of every soloist to the first one."""
+    for name, soloist_files in zip(names[1:], files[1:]):
+        summary = paired_summary(soloist_files, files[0])
+        reward_low, reward_high = summary.mean_difference_interval()
+        win_low, win_high = summary.win_rate_difference_interval()
+        print(f"{name} - {names[0]} over {summary.count} deals: "
+              f"reward {summary.difference.mean:+.2f} [{reward_low:+.2f}, {reward_high:+.2f}], "
+              f"win rate {summary.win_difference.mean * 100:+.1f}% [{win_low * 100:+.1f}%, {win_high * 100:+.1f}%], "
+              f"{summary.variance_reduction:.1f}x fewer games than unpaired")
+
+
+def main():
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Compare soloists on the same deals with paired confidence intervals",
+                            prog="python -m duplicate_evaluation")
+    parser.add_argument("--soloists", nargs='+', default=["SimplePlayerV1", "AdvancedPlayer"],
+                        help="list of player names or paths to compare, the first one is the baseline")
+    parser.add_argument("--defenders", nargs='+', default=["SimplePlayerV1"],
+                        help="one player name or path for both defenders, or two for the two defender seats")
+    parser.add_argument("--rotate-defenders", action='store_true',
+                        help="set flag to play every deal with both seatings of the defenders")
+    parser.add_argument("--trump-strategy", type=str, default="SuitAmountTrumpStrategyBetterSkat",
+                        help="the trump strategy to use for non-model players (default: SuitAmountTrumpStrategyBetterSkat)")
+    parser.add_argument("--game-count", type=int, default=5000,
+                        help="how many deals to play with each soloist (default: 5000)")
+    parser.add_argument("--seed", type=int, default=1337,
+                        help="the seed for the played games and the players (default: 1337)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="how many processes to simulate the games in, does not change the results (default: 1)")
+    parser.add_argument("--result-cache", type=str, default=None,
+                        help="database of simulated games, e.g. logs/results.sqlite, only games missing from it are "
+                             "simulated (default: none, all games are simulated)")
+    parser.add_argument("--device", "-d", choices=["auto", "cpu", "cuda"], default="auto",
+                        help="Device on which to run the model players (default: auto)")
+
+    args = parser.parse_args()
+
+    trump_strategy = getattr(players.trump_strategies, args.trump_strategy)()
+    soloists = [get_player(name, seed=args.seed, trump_strategy=trump_strategy, device=args.device)
+                for name in args.soloists]
+    defenders = [get_player(name, seed=args.seed, trump_strategy=trump_strategy, device=args.device)
+                 for name in args.defenders]
+    if len(defenders) == 1:
+        defenders.append(defenders[0].clone())
+
+    cache = None if args.result_cache is None else ResultCache(args.result_cache)
+    files = duplicate_stats(args.game_count, soloists, defenders, args.seed, args.rotate_defenders,
+                            workers=args.workers, cache=cache)
+    if cache is not None:
+        cache.close()
+    print()
+    print_paired_comparison([str(soloist) for soloist in soloists], files)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import math
+from typing import Optional
+
+from game_summary import GameSummary
+
+METRICS = ["win_rate", "reward"]
+
+
+class StoppingRule:
+    """Decides after every game whether the result of a matchup is settled, so that no more games are needed."""
+
+    def should_stop(self, summary: GameSummary) -> bool:
+        raise NotImplementedError
+
+    def describe(self, summary: GameSummary) -> str:
+        """:returns: The result of the rule for the summary, to print once it stopped."""
+        return ""
+
+
+class SPRT(StoppingRule):
+    """
+    Wald's sequential probability ratio test of the hypotheses that the soloist's win rate (or mean reward) is low
+    against that it is high, with error probabilities alpha and beta. The mean reward is tested with a normal
+    likelihood and the observed variance, so it only starts after min_games.
+    """
+
+    def __init__(self, metric="win_rate", low: Optional[float] = None, high: Optional[float] = None, alpha=0.05,
+                 beta=0.05, min_games=30):
+        self.metric = metric
+        if metric == "win_rate":
+            self.low, self.high = 0.45 if low is None else low, 0.55 if high is None else high
+        else:
+            self.low, self.high = 55.0 if low is None else low, 65.0 if high is None else high
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+        self.min_games = min_games
+
+    def log_likelihood_ratio(self, summary: GameSummary) -> float:
+        if self.metric == "win_rate":
+            return (summary.wins * math.log(self.high / self.low)
+                    + (summary.count - summary.wins) * math.log((1 - self.high) / (1 - self.low)))
+        if summary.count < self.min_games or not summary.variance:
+            return 0.0
+        return (self.high - self.low) / summary.variance * (
+                summary.total - summary.count * (self.low + self.high) / 2)
+
+    def decision(self, summary: GameSummary) -> Optional[bool]:
+        """:returns: True if the high hypothesis is accepted, False if the low one is and None if undecided."""
+        ratio = self.log_likelihood_ratio(summary)
+        if ratio >= self.upper_bound:
+            return True
+        if ratio <= self.lower_bound:
+            return False
+        return None
+
+    def should_stop(self, summary: GameSummary) -> bool:
+        return self.decision(summary) is not None
+
+    def describe(self, summary: GameSummary) -> str:
+        accepted = self.high if self.decision(summary) else self.low
+        return f"SPRT accepted {self.metric} {'>=' if self.decision(summary) else '<='} {accepted}"
+
+
+class IntervalWidth(StoppingRule):
+    """Stops once the confidence interval of the win rate (or mean reward) is at most half_width wide on each side."""
+
+    def __init__(self, metric="win_rate", half_width: Optional[float] = None, z=1.96, min_games=30):
+        self.metric = metric
+        self.half_width = (0.02 if metric == "win_rate" else 1.0) if half_width is None else half_width
+        self.z = z
+        self.min_games = min_games
+
+    def interval(self, summary: GameSummary) -> tuple[float, float]:
+        return summary.win_rate_interval(self.z) if self.metric == "win_rate" else summary.mean_interval(self.z)
+
+    def should_stop(self, summary: GameSummary) -> bool:
+        low, high = self.interval(summary)
+        return summary.count >= self.min_games and (high - low) / 2 <= self.half_width
+
+    def describe(self, summary: GameSummary) -> str:
+        low, high = self.interval(summary)
+        return f"{self.metric} interval [{low:.3f}, {high:.3f}]"
+
+
+def add_stopping_arguments(parser):
+    parser.add_argument("--early-stop", choices=["sprt", "interval"], default=None,
+                        help="stop simulating a matchup once its result is settled by a sequential probability ratio "
+                             "test or a confidence interval width, --game-count is the maximum then")
+    parser.add_argument("--stop-metric", choices=METRICS, default="win_rate",
+                        help="the metric the early stop looks at (default: win_rate)")
+    parser.add_argument("--sprt-bounds", nargs=2, type=float, default=None,
+                        help="low and high hypothesis of the SPRT (default: 0.45 0.55 for the win rate, 55 65 for the "
+                             "reward)")
+    parser.add_argument("--interval-width", type=float, default=None,
+                        help="the confidence interval half width to stop at (default: 0.02 for the win rate, 1 for "
+                             "the reward)")
+
+
+def stopping_rule_from_args(args) -> Optional[StoppingRule]:
+    if args.early_stop == "sprt":
+        return SPRT(args.stop_metric, *(args.sprt_bounds or (None, None)))
+    if args.early_stop == "interval":
+        return IntervalWidth(args.stop_metric, args.interval_width)
+    return None
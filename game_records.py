@@ -0,0 +1,124 @@
+from typing import Optional, Type
+
+import numpy as np
+
+from card import Card, Suit
+from observers import Observer
+from skat_game import SkatGame, PlayerParty
+
+# One played game. Card ids refer to Card.id, the deal holds all cards in dealt order (cards 0-9, 10-19 and 20-29 are
+# the hands of the players 0, 1 and 2, cards 30 and 31 the dealt skat).
+GAME_RECORD_DTYPE = np.dtype([
+    ("run", np.uint32),
+    ("deal", np.uint8, 32),
+    ("start_player", np.uint8),
+    ("soloist", np.uint8),
+    ("trump", np.uint8),
+    # the cards the soloist put into the skat
+    ("skat", np.uint8, 2),
+    # all played cards in play order
+    ("cards", np.uint8, 30),
+    # the total card points of the soloist
+    ("soloist_points", np.uint8),
+])
+
+
+def record_filename(stats_filename: str) -> str:
+    """:returns: The name of the game record file that belongs to a statistics file."""
+    return stats_filename.rsplit(".", 1)[0] + ".games"
+
+
+class GameRecorder(Observer):
+    """
+    Appends a GAME_RECORD_DTYPE record of every observed game to a file. Records are buffered and written once
+    buffer_size games are complete or the recorder is closed. Without a file, the records are collected with take.
+    """
+
+    def __init__(self, filename: Optional[str], buffer_size=1000):
+        super().__init__()
+        self.filename = filename
+        self._file = None if filename is None else open(filename, "ab")
+        self._buffer = np.zeros(buffer_size, dtype=GAME_RECORD_DTYPE)
+        self._buffered = 0
+        self._game: Optional[SkatGame] = None
+        self._record = None
+        self._cards_played = 0
+
+    def attach(self, game: SkatGame, run: int):
+        """Starts recording the game, must be called before the bid results are set."""
+        self._game = game
+        self._record = self._buffer[self._buffered]
+        self._record["run"] = run
+        self._record["deal"] = [card.id for card in game.cards]
+        self._record["start_player"] = game.start_player
+        self._cards_played = 0
+        game.add_observer(self, game.start_player)
+
+    def on_trump(self, trump: Suit):
+        self._record["trump"] = trump
+
+    def on_soloist(self, soloist: int):
+        self._record["soloist"] = soloist
+        self._record["skat"] = [card.id for card in self._game.skat]
+
+    def on_card_played(self, card: Card, player: int):
+        self._record["cards"][self._cards_played] = card.id
+        self._cards_played += 1
+
+    def on_stich_made(self, winner: int, points: int):
+        if self._cards_played == 30:
+            self._record["soloist_points"] = self._game.points[PlayerParty.soloist]
+            self._game = self._record = None
+            self._buffered += 1
+            if self._buffered == len(self._buffer):
+                if self._file is None:
+                    self._buffer = np.concatenate([self._buffer, np.zeros_like(self._buffer)])
+                else:
+                    self.flush()
+
+    def take(self) -> np.ndarray:
+        """:returns: The buffered records, which are removed from the buffer."""
+        records = self._buffer[:self._buffered].copy()
+        self._buffered = 0
+        return records
+
+    def write_records(self, records: np.ndarray):
+        """Appends records, e.g. taken from another recorder, after flushing the own buffer."""
+        self.flush()
+        self._file.write(records.tobytes())
+        self._file.flush()
+
+    def flush(self):
+        if self._buffered:
+            self._file.write(self.take().tobytes())
+            self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def read_game_records(filename: str) -> np.ndarray:
+    """:returns: The records of the file as memory-mapped array with GAME_RECORD_DTYPE."""
+    with open(filename, "rb") as file:
+        if not file.read(1):
+            return np.zeros(0, dtype=GAME_RECORD_DTYPE)
+    return np.memmap(filename, dtype=GAME_RECORD_DTYPE, mode="r")
+
+
+def replay_game(record: np.void, observers: list[tuple[Observer, int]], game_class: Type[SkatGame] = SkatGame
+                ) -> SkatGame:
+    """
+    Plays a recorded game again, so that the observers receive the same events as in the original game.
+    :param observers: The observers with the id of the player they observe.
+    :returns: The finished game.
+    """
+    game = game_class(
+        deal=[Card.from_id(card_id) for card_id in record["deal"]], start_player=int(record["start_player"]))
+    for observer, player_id in observers:
+        game.add_observer(observer, player_id)
+    game.set_bid_results(
+        Suit(record["trump"]), int(record["soloist"]), [Card.from_id(card_id) for card_id in record["skat"]])
+    for card_id in record["cards"]:
+        game.play_card(Card.from_id(card_id))
+    return game
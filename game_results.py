@@ -0,0 +1,127 @@
+import ast
+import os
+from typing import Optional
+
+import numpy as np
+
+from card import Card
+from skat_game import SkatGame, PlayerParty
+
+# The result of one game, the soloist is player 0.
+RESULT_DTYPE = np.dtype([
+    ("run", np.uint32),
+    ("total_reward", np.uint8),
+    ("trump", np.uint8),
+    # strength of the soloist's hand after taking the skat: number of trumps and card points
+    ("soloist_trumps", np.uint8),
+    ("soloist_hand_points", np.uint8),
+    ("soloist_stiche", np.uint8),
+    # seconds each player spent choosing cards
+    ("decision_time", np.float32, 3),
+])
+
+# every .npy header is padded to this length, so that it can be rewritten in place when rows are appended
+_HEADER_LENGTH = 128
+
+
+def results_dirname(stats_filename: str) -> str:
+    """:returns: The name of the directory with the result columns that belongs to a statistics file."""
+    return stats_filename.rsplit(".", 1)[0] + ".results"
+
+
+def game_result(run: int, game: SkatGame, decision_times: list[float]) -> tuple:
+    """:returns: The row of RESULT_DTYPE for a finished game."""
+    soloist_hand: list[Card] = []
+    soloist_stiche = 0
+    for stich in game.stich_list[:-1]:
+        soloist_hand += [card for card, player in stich if player == game.soloist]
+        soloist_stiche += game.winner(stich) == game.soloist
+    return (
+        run,
+        game.points[PlayerParty.soloist],
+        game.card_info.trump,
+        sum(game.card_info.is_trump(card) for card in soloist_hand),
+        sum(card.reward for card in soloist_hand),
+        soloist_stiche,
+        decision_times,
+    )
+
+
+def _npy_header(dtype: np.dtype, shape: tuple) -> bytes:
+    header = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": shape})
+    header = header.ljust(_HEADER_LENGTH - 10 - 1) + "\n"
+    return np.lib.format.MAGIC_PREFIX + bytes([1, 0]) + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+
+def append_to_npy(filename: str, rows: np.ndarray):
+    """Appends rows to a .npy file created by this function, or creates it."""
+    if os.path.isfile(filename):
+        with open(filename, "r+b") as file:
+            header = file.read(_HEADER_LENGTH)
+            shape = ast.literal_eval(header[10:].decode("latin1"))["shape"]
+            file.seek(0)
+            file.write(_npy_header(rows.dtype, (shape[0] + len(rows),) + rows.shape[1:]))
+            file.seek(0, os.SEEK_END)
+            file.write(rows.tobytes())
+    else:
+        with open(filename, "wb") as file:
+            file.write(_npy_header(rows.dtype, rows.shape))
+            file.write(rows.tobytes())
+
+
+class ResultsWriter:
+    """
+    Collects game results (see RESULT_DTYPE) and writes them in blocks of buffer_size rows: to one .npy file per column
+    in results_dir and/or as run and total reward to a TSV file.
+    """
+
+    def __init__(self, tsv_filename: Optional[str], results_dir: Optional[str], buffer_size=10_000):
+        self.results_dir = results_dir
+        self._tsv_file = None
+        if tsv_filename is not None:
+            self._tsv_file = open(tsv_filename, "a")
+            self._tsv_file.write("run\ttotal_reward\n")
+        if results_dir is not None:
+            os.makedirs(results_dir, exist_ok=True)
+        self._buffer = np.zeros(buffer_size, dtype=RESULT_DTYPE)
+        self._buffered = 0
+
+    def add(self, result: tuple):
+        self._buffer[self._buffered] = result
+        self._buffered += 1
+        if self._buffered == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        rows = self._buffer[:self._buffered]
+        if self._tsv_file is not None:
+            self._tsv_file.write("".join(f"{run}\t{reward}\n" for run, reward in zip(
+                rows["run"].tolist(), rows["total_reward"].tolist())))
+            self._tsv_file.flush()
+        if self.results_dir is not None and len(rows):
+            for column in RESULT_DTYPE.names:
+                append_to_npy(f"{self.results_dir}/{column}.npy", np.ascontiguousarray(rows[column]))
+        self._buffered = 0
+
+    def close(self):
+        self.flush()
+        if self._tsv_file is not None:
+            self._tsv_file.close()
+
+
+def read_results(results_dir: str) -> dict[str, np.ndarray]:
+    """:returns: The memory-mapped columns of the results, by column name."""
+    return {column: np.load(f"{results_dir}/{column}.npy", mmap_mode="r") for column in RESULT_DTYPE.names}
+
+
+def read_rewards(stats_filename: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :returns: The runs and total rewards of a statistics file, from its results directory if it has one (logs of older
+    versions only have the TSV file).
+    """
+    results_dir = results_dirname(stats_filename)
+    if os.path.isdir(results_dir):
+        return (np.load(f"{results_dir}/run.npy", mmap_mode="r"),
+                np.load(f"{results_dir}/total_reward.npy", mmap_mode="r"))
+    table = np.loadtxt(stats_filename, dtype=np.int64, delimiter="\t", skiprows=1, ndmin=2)
+    return table[:, 0], table[:, 1]
@@ -0,0 +1,198 @@
+import json
+import math
+import os
+
+
+def summary_filename(stats_filename: str) -> str:
+    """:returns: The name of the summary sidecar that belongs to a statistics file."""
+    return stats_filename.rsplit(".", 1)[0] + ".summary.json"
+
+
+class GameSummary:
+    """
+    Aggregates the total rewards of the soloist while they are simulated: count, sum, mean and variance (Welford's
+    algorithm), wins and a histogram of the points 0 to 120.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.wins = 0
+        self.histogram = [0] * 121
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, total_reward: int):
+        self.count += 1
+        self.total += total_reward
+        self.wins += total_reward > 60
+        self.histogram[total_reward] += 1
+        delta = total_reward - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (total_reward - self._mean)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    @property
+    def variance(self) -> float:
+        """:returns: The sample variance of the total rewards."""
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.count if self.count else math.nan
+
+    def mean_interval(self, z=1.96) -> tuple[float, float]:
+        """:returns: The normal approximation confidence interval of the mean reward (default: 95%)."""
+        if self.count < 2:
+            return math.nan, math.nan
+        half_width = z * math.sqrt(self.variance / self.count)
+        return self.mean - half_width, self.mean + half_width
+
+    def win_rate_interval(self, z=1.96) -> tuple[float, float]:
+        """:returns: The Wilson score confidence interval of the win rate (default: 95%)."""
+        if self.count == 0:
+            return math.nan, math.nan
+        n, p = self.count, self.win_rate
+        center = (p + z * z / (2 * n)) / (1 + z * z / n)
+        half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+        return center - half_width, center + half_width
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "wins": self.wins,
+            "mean": self.mean,
+            "variance": self.variance,
+            "win_rate": self.win_rate,
+            "mean_interval": self.mean_interval(),
+            "win_rate_interval": self.win_rate_interval(),
+            "histogram": self.histogram,
+            # the exact Welford state, so that loaded summaries give the same variance
+            "welford": [self._mean, self._m2],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GameSummary":
+        summary = cls()
+        summary.count, summary.total, summary.wins = data["count"], data["total"], data["wins"]
+        summary.histogram = data["histogram"]
+        summary._mean, summary._m2 = data["welford"]
+        return summary
+
+    def save(self, filename: str):
+        with open(filename, "w") as file:
+            json.dump(self.to_dict(), file)
+
+
+class _Moments:
+    """Running mean and variance (Welford's algorithm)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def interval(self, z=1.96) -> tuple[float, float]:
+        if self.count < 2:
+            return math.nan, math.nan
+        half_width = z * math.sqrt(self.variance / self.count)
+        return self.mean - half_width, self.mean + half_width
+
+
+class PairedSummary:
+    """
+    Compares two soloists that played the same deals: the differences of their total rewards and wins are aggregated
+    per deal, so the deal quality cancels out of the confidence intervals.
+    """
+
+    def __init__(self):
+        self.first = _Moments()
+        self.second = _Moments()
+        self.difference = _Moments()
+        self.win_difference = _Moments()
+
+    def add(self, first_rewards: list[int], second_rewards: list[int]):
+        """Adds one deal with the rewards of each soloist in all seatings of the defenders it was played in."""
+        first = sum(first_rewards) / len(first_rewards)
+        second = sum(second_rewards) / len(second_rewards)
+        self.first.add(first)
+        self.second.add(second)
+        self.difference.add(first - second)
+        self.win_difference.add(
+            sum(reward > 60 for reward in first_rewards) / len(first_rewards)
+            - sum(reward > 60 for reward in second_rewards) / len(second_rewards))
+
+    @property
+    def count(self) -> int:
+        return self.difference.count
+
+    def mean_difference_interval(self, z=1.96) -> tuple[float, float]:
+        """:returns: The paired confidence interval of the mean reward difference (default: 95%)."""
+        return self.difference.interval(z)
+
+    def win_rate_difference_interval(self, z=1.96) -> tuple[float, float]:
+        """:returns: The paired confidence interval of the win rate difference (default: 95%)."""
+        return self.win_difference.interval(z)
+
+    @property
+    def variance_reduction(self) -> float:
+        """
+        :returns: How many times more games an unpaired comparison of the same deals needs for the same confidence
+        interval width of the mean reward difference. Infinite if the differences do not vary (e.g. when a player is
+        compared with itself), nan if no rewards vary.
+        """
+        unpaired_variance = self.first.variance + self.second.variance
+        if self.difference.variance == 0:
+            return math.inf if unpaired_variance else math.nan
+        return unpaired_variance / self.difference.variance
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_difference": self.difference.mean,
+            "mean_difference_interval": self.mean_difference_interval(),
+            "win_rate_difference": self.win_difference.mean,
+            "win_rate_difference_interval": self.win_rate_difference_interval(),
+            "variance_reduction": self.variance_reduction,
+        }
+
+
+def load_summary(stats_filename: str) -> GameSummary:
+    """
+    :returns: The summary of a statistics file from its sidecar. Files without sidecar (e.g. logs of older versions)
+    are parsed once instead.
+    """
+    filename = summary_filename(stats_filename)
+    if os.path.isfile(filename):
+        with open(filename, "r") as file:
+            return GameSummary.from_dict(json.load(file))
+    summary = GameSummary()
+    with open(stats_filename, "r") as stats_file:
+        for line in stats_file.readlines()[1:]:
+            _, reward = line.split("\t")
+            summary.add(int(reward))
+    return summary
+
+
+def histogram_groups(summary: GameSummary, upper_bounds: list[int]) -> list[int]:
+    """:returns: The number of games with points up to each upper bound (and above the previous one)."""
+    groups = []
+    lower = 0
+    for upper in upper_bounds:
+        groups.append(sum(summary.histogram[lower:upper + 1]))
+        lower = upper + 1
+    return groups
@@ -1,28 +1,44 @@
-from typing import Optional
+from typing import Callable, Optional
 
+import numpy as np
 from gym.spaces import Discrete
 
-from card import Card, Suit, Rank
+from card import Card, Suit, Rank, CardInfo
 from observers import ModelObserver
+from .flat_encoding import FlatEncoder
 
 
 class CardMapping:
-    def __init__(self, card_order: list[Card]):
-        self.cards = card_order
-        self.card_ids = {card: card_id for card_id, card in enumerate(self.cards)}
-
-    def id(self, card: Card):
-        return self.card_ids[card]
+    """
+    Maps cards to actions and back. There is one mapping per card order, built at import and shared by all observers
+    (see simple_card_mapping and positional_trump_mapping), so the arrays are immutable.
+    """
 
-    def card(self, card_id: int):
+    def __init__(self, card_order: list[Card]):
+        # the card id of each action and the action of each card id
+        self.card_ids = np.array([card.id for card in card_order], dtype=np.int8)
+        self.action_ids = np.empty(len(card_order), dtype=np.int8)
+        self.action_ids[self.card_ids] = np.arange(len(card_order))
+        # the card mask bit of each action, to map card masks to action masks
+        self.action_bits = np.array([card.mask for card in card_order], dtype=np.int64)
+        for array in (self.card_ids, self.action_ids, self.action_bits):
+            array.setflags(write=False)
+        # plain tuple copies for fast scalar lookups
+        self.cards = tuple(Card.from_id(card_id) for card_id in self.card_ids.tolist())
+        self._action_ids = tuple(self.action_ids.tolist())
+
+    def id(self, card: Card) -> int:
+        return self._action_ids[card.id]
+
+    def card(self, card_id: int) -> Card:
         return self.cards[card_id]
 
+    def action_mask(self, card_mask: int) -> np.ndarray:
+        """:returns: Whether the card of each action is contained in the card mask (see Card.mask)."""
+        return np.bitwise_and(self.action_bits, card_mask) != 0
 
-def simple_card_mapping(trump: Suit):
-    return CardMapping([Card(suit, rank) for suit in Suit for rank in Rank])
 
-
-def positional_trump_mapping(trump: Suit):
+def _positional_trump_order(trump: Suit) -> list[Card]:
     cards: list[Card] = []
     for suit in Suit:
         cards.append(Card(suit, Rank.jack))
@@ -35,7 +51,20 @@ def positional_trump_mapping(trump: Suit):
         for rank in Rank:
             if rank != Rank.jack:
                 cards.append(Card(suit, rank))
-    return CardMapping(cards)
+    return cards
+
+
+_simple_card_mapping = CardMapping(list(Card.all()))
+_positional_trump_mappings = tuple(CardMapping(_positional_trump_order(trump)) for trump in Suit)
+
+
+def simple_card_mapping(trump: Suit) -> CardMapping:
+    return _simple_card_mapping
+
+
+def positional_trump_mapping(trump: Suit) -> CardMapping:
+    """:returns: The mapping with the jacks first, then the other trumps and then the remaining suits."""
+    return _positional_trump_mappings[trump]
 
 
 class BasicModelObserver(ModelObserver):
@@ -56,6 +85,18 @@ class BasicModelObserver(ModelObserver):
         self._trump: Optional[Suit] = None
         self._round: Optional[int] = None
         self._initial_hand: Optional[list[Card]] = None
+        self._card_info: Optional[CardInfo] = None
+        # the cards in the hand of the agent and of the leading ingame suit of the current stich as card masks,
+        # the leading mask is 0 while no card of the stich was played
+        self._hand_mask = 0
+        self._leading_mask = 0
+
+        # the current value of each key of the dict observation, for write_observation
+        self._observation_values: dict[str, Callable] = {
+            "trump": lambda: self._trump,
+            "total_points": lambda: self._total_points,
+        }
+        self._flat_encoder: Optional[FlatEncoder] = None
 
     def on_game_start(self, player_id: int, hand: list[Card]):
         self._id = player_id
@@ -63,9 +104,12 @@ class BasicModelObserver(ModelObserver):
         self._round = 0
         self._total_points = 0
         self._last_points = 0
+        self._hand_mask = Card.mask_of(hand)
+        self._leading_mask = 0
 
     def on_trump(self, trump: Suit):
         self._card_mapping = self._card_mapping_generator(trump)
+        self._card_info = CardInfo(trump)
         self._trump = trump
 
     def on_soloist(self, soloist: int):
@@ -74,9 +118,17 @@ class BasicModelObserver(ModelObserver):
     def on_skat(self, skat: list[Card], new_hand: list[Card]):
         for card in skat:
             self._total_points += card.reward
+        self._hand_mask = Card.mask_of(new_hand)
+
+    def on_card_played(self, card: Card, player_id: int):
+        if player_id == self._id:
+            self._hand_mask ^= card.mask
+        if not self._leading_mask:
+            self._leading_mask = self._card_info.suit_masks[self._card_info.ingame_suit(card)]
 
     def on_stich_made(self, winner: int, points: int):
         self._round += 1
+        self._leading_mask = 0
         win_as_soloist = self._soloist == self._id and winner == self._soloist
         win_as_defender = self._soloist != self._id and winner != self._soloist
         win = win_as_soloist or win_as_defender
@@ -86,6 +138,30 @@ class BasicModelObserver(ModelObserver):
     def get_observation(self):
         raise NotImplementedError
 
+    @property
+    def flat_encoder(self) -> FlatEncoder:
+        """The flat encoding of the observation space, with its Box space and the slices of the dict keys."""
+        if self._flat_encoder is None:
+            self._flat_encoder = FlatEncoder(self.observation_space)
+        return self._flat_encoder
+
+    def write_observation(self, buffer: np.ndarray):
+        self.flat_encoder.write(self._observation_values, buffer)
+
+    def _card_event_id(self, card: Optional[Card], player_id: Optional[int]) -> int:
+        """:returns: The observation code of a card played by a player, or of no card if card is None."""
+        raise NotImplementedError
+
+    def _current_stich_ids(self) -> np.ndarray:
+        """
+        :returns: The codes of the cards in the current stich, padded with the code of no card, for observers that
+        keep the current stich in _current_stich and a buffer for its codes in _stich_ids.
+        """
+        self._stich_ids.fill(self._card_event_id(None, None))
+        for index, (card, player_id) in enumerate(self._current_stich):
+            self._stich_ids[index] = self._card_event_id(card, player_id)
+        return self._stich_ids
+
     def get_reward(self):
         reward = self._last_points
         if self._win_reward and self._round == 10:
@@ -105,3 +181,7 @@ class BasicModelObserver(ModelObserver):
 
     def get_card(self, action: int):
         return self._card_mapping.card(action)
+
+    def action_masks(self) -> np.ndarray:
+        # the cards of the leading suit if the agent has any, otherwise the whole hand
+        return self._card_mapping.action_mask(self._hand_mask & self._leading_mask or self._hand_mask)
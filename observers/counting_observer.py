@@ -4,7 +4,7 @@ from typing import Optional
 import numpy as np
 from gym.spaces import Discrete, Dict, MultiDiscrete, Box, MultiBinary
 
-from card import Card, Suit, IngameSuit, CardInfo
+from card import Card, Suit, IngameSuit
 from skat_game import Stich
 from .basic_model_observer import BasicModelObserver
 
@@ -24,8 +24,10 @@ class CountingObserver(BasicModelObserver):
         })
 
         self._card_options: Optional[np.ndarray] = None
-        self._card_info: Optional[CardInfo] = None
         self._current_stich: Stich = []
+        self._stich_ids = np.full(2, self._card_event_id(None, None))
+        self._observation_values.update(
+            card_options=lambda: self._card_options, stich=self._current_stich_ids)
         self.leading_suit: Optional[IngameSuit] = None
 
     def relative_id(self, player_id):
@@ -57,7 +59,6 @@ class CountingObserver(BasicModelObserver):
     def on_trump(self, trump: Suit):
         super().on_trump(trump)
         self._init_observation_state()
-        self._card_info = CardInfo(trump)
 
     def on_skat(self, skat: list[Card], new_hand: list[Card]):
         super().on_skat(skat, new_hand)
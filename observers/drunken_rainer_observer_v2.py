@@ -30,6 +30,9 @@ class DrunkenRainerObserverV2(BasicModelObserver):
 
         self._card_positions: Optional[np.ndarray] = None
         self._current_stich: Stich = []
+        self._stich_ids = np.full(2, self._card_event_id(None, None))
+        self._observation_values.update(
+            card_positions=lambda: self._card_positions, stich=self._current_stich_ids)
 
     def _set_card_position(self, card: Card, position: CardPosition):
         self._card_positions[self._card_mapping.id(card)] = position
@@ -0,0 +1,68 @@
+from typing import Callable, Union
+
+import numpy as np
+from gym.spaces import Box, Dict, Discrete, MultiBinary, MultiDiscrete
+
+
+class FlatEncoder:
+    """
+    Encodes observations of a Dict space as one float vector, like SB3 preprocesses them for MultiInputPolicy: the keys
+    in the order of the space, Discrete and MultiDiscrete values one-hot, MultiBinary and Box values as they are. The
+    encoding is written into a caller-provided buffer, without allocating arrays.
+    """
+
+    def __init__(self, space: Dict):
+        # the slice of each key of the dict in the flat encoding
+        self.layout: dict[str, slice] = {}
+        self._parts = []
+        low, high = [], []
+        start = 0
+        for key, subspace in space.spaces.items():
+            if isinstance(subspace, Discrete):
+                size = int(subspace.n)
+                offsets = None
+            elif isinstance(subspace, MultiDiscrete):
+                size = int(subspace.nvec.sum())
+                # index of the first one-hot entry of each value in the flat encoding
+                offsets = start + np.concatenate([[0], np.cumsum(subspace.nvec)[:-1]]).astype(np.int64)
+            elif isinstance(subspace, (MultiBinary, Box)):
+                size = int(np.prod(subspace.shape))
+                offsets = None
+            else:
+                raise NotImplementedError(f"{type(subspace).__name__} spaces cannot be flattened")
+            self.layout[key] = slice(start, start + size)
+            indices = None if offsets is None else np.zeros_like(offsets)
+            self._parts.append((key, subspace, self.layout[key], offsets, indices))
+            if isinstance(subspace, Box):
+                low.append(np.broadcast_to(subspace.low, subspace.shape).reshape(-1))
+                high.append(np.broadcast_to(subspace.high, subspace.shape).reshape(-1))
+            else:
+                low.append(np.zeros(size))
+                high.append(np.ones(size))
+            start += size
+        self.size = start
+        self.observation_space = Box(
+            np.concatenate(low).astype(np.float32), np.concatenate(high).astype(np.float32), dtype=np.float32)
+
+    def zeros(self) -> np.ndarray:
+        """:returns: A buffer for one encoded observation."""
+        return np.zeros(self.size, dtype=np.float32)
+
+    def write(self, values: dict[str, Callable[[], Union[int, np.ndarray]]], buffer: np.ndarray):
+        """
+        :param values: Returns the current value of each key of the space, as in the dict observation.
+        :param buffer: The float vector of size self.size to write to.
+        """
+        for key, subspace, part, offsets, indices in self._parts:
+            value = values[key]()
+            if isinstance(subspace, Discrete):
+                buffer[part] = 0
+                buffer[part.start + value] = 1
+            elif offsets is not None:
+                buffer[part] = 0
+                np.add(value, offsets, out=indices)
+                buffer[indices] = 1
+            elif isinstance(value, np.ndarray):
+                buffer[part] = value.reshape(-1)
+            else:
+                buffer[part] = value
@@ -32,6 +32,9 @@ class MarkovObserverV1(BasicModelObserver):
         self._stich_array: Optional[np.ndarray] = None
         self._stich_window: Optional[tuple[int, int]] = None
         self._current_card_index: Optional[int] = None
+        self._stich_list_view: Optional[np.ndarray] = None
+        self._observation_values.update(
+            card_positions=lambda: self._card_positions, stich_list=lambda: self._stich_list_view)
 
     def _set_card_position(self, card: Card, position: CardPosition):
         self._card_positions[self._card_mapping.id(card)] = position
@@ -47,6 +50,8 @@ class MarkovObserverV1(BasicModelObserver):
         self._stich_array = np.full(60, self._card_event_id(None, None))
         self._stich_window = (0, 30)
         self._current_card_index = 27
+        # the window does not move during a game
+        self._stich_list_view = self._stich_list()
         self._card_positions = np.full(32, CardPosition.other_player_hand)
         for card in self._initial_hand:
             self._set_card_position(card, CardPosition.agent_hand)
@@ -9,8 +9,23 @@ class ModelObserver(Observer):
     def get_observation(self):
         raise NotImplementedError
 
+    def write_observation(self, buffer):
+        """Writes the current observation as flat vector into the buffer."""
+        raise NotImplementedError
+
+    def observation(self, buffer=None):
+        """:returns: The current observation, written flat into the buffer and returned as it if a buffer is given."""
+        if buffer is None:
+            return self.get_observation()
+        self.write_observation(buffer)
+        return buffer
+
     def get_reward(self):
         raise NotImplementedError
 
     def get_card(self, action: int):
         raise NotImplementedError
+
+    def action_masks(self):
+        """:returns: Whether each action plays a valid card, on the turn of the agent."""
+        raise NotImplementedError
@@ -1,3 +1,5 @@
+from typing import Callable, Optional
+
 from card import Card, Suit
 
 
@@ -5,6 +7,10 @@ class Observer:
     def __str__(self):
         return self.__class__.__name__
 
+    def handler(self, event: str) -> Optional[Callable]:
+        """:returns: The bound method for the event or None if this observer keeps the no-op of Observer."""
+        return getattr(self, event) if getattr(type(self), event) is not getattr(Observer, event) else None
+
     def on_game_start(self, player_id: int, hand: list[Card]):
         pass
 
@@ -22,3 +28,7 @@ class Observer:
 
     def on_stich_made(self, winner: int, points: int):
         pass
+
+    def on_stich_complete(self, stich: list[tuple[Card, int]], winner: int, points: int):
+        """Receives each stich at once after on_stich_made, as (card, player) pairs in the order they were played."""
+        pass
@@ -7,6 +7,8 @@ from .multi_model_player import MultiModelPlayer
 from .random_player import RandomPlayer
 from .simple_player_v1 import SimplePlayerV1
 from .advanced_player import AdvancedPlayer
+from .pimc_player import PIMCPlayer
+from .ismcts_player import ISMCTSPlayer
 
 
 def get_player(name_or_path: str, **kwargs):
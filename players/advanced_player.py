@@ -11,7 +11,7 @@ from skat_game import Stich
 class CardPositions:
     @staticmethod
     def index(player: int, card: Card):
-        return card.suit * len(Rank) * 3 + card.rank * 3 + player
+        return card.id * 3 + player
 
     def __init__(self, own_id: int, hand: list[Card]):
         self.card_info: Optional[CardInfo] = None
@@ -66,13 +66,12 @@ class CardPositions:
         return None
 
     def player_wins_prob(self, player: int, against_card: Card, leading_suit: IngameSuit) -> float:
-        against_strength = self.card_info.ingame_strength(against_card, leading_suit)
+        strengths = self.card_info.strengths(leading_suit)
+        against_strength = strengths[against_card.id]
         no_higher_in_suit = 1
-        for card in filter(
-            lambda c: self.card_info.ingame_strength(c, leading_suit) > against_strength,
-            self.card_info.cards(self.card_info.ingame_suit(against_card))
-        ):
-            no_higher_in_suit *= 1 - self.player_has_card_prob(player, card)
+        for card in self.card_info.cards(self.card_info.ingame_suit(against_card)):
+            if strengths[card.id] > against_strength:
+                no_higher_in_suit *= 1 - self.player_has_card_prob(player, card)
 
         if leading_suit == IngameSuit.trump:
             return 1 - no_higher_in_suit
@@ -172,8 +171,9 @@ class AdvancedPlayer(Player, Observer):
     def assumed_opponent_cards(self):
         return self.played_opponent_cards() + self.possible_opponent_cards()
 
-    def wins_against(self, card1: Card, card2: Card):
-        return max(card1, card2, key=lambda card: self.card_info.ingame_strength(card, self.leading_suit)) is card1
+    def wins_against(self, card1: Card, card2: Optional[Card]):
+        strengths = self.card_info.strengths(self.leading_suit)
+        return card2 is None or strengths[card1.id] >= strengths[card2.id]
 
     def winning_cards(self, cards: list[Card], opponent_cards: list[Card]):
         return [card for card in cards if all(self.wins_against(card, op_card) for op_card in opponent_cards)]
@@ -190,7 +190,8 @@ class AdvancedPlayer(Player, Observer):
             return min(cheap_contesting, key=CardInfo.reward)
 
     def weak_card(self, cards: list[Card]):
-        return min(cards, key=lambda c: self.card_info.ingame_strength(c, self.leading_suit))
+        strengths = self.card_info.strengths(self.leading_suit)
+        return min(cards, key=lambda c: strengths[c.id])
 
     def safe_non_trump_defender(self, solo_suit_probs: list[tuple[IngameSuit, float]]):
         for suit, solo_suit_prob in solo_suit_probs:
@@ -205,7 +206,7 @@ class AdvancedPlayer(Player, Observer):
         partner_after_me = self.partner == (self.id + 1) % 3
         for suit, solo_suit_prob in solo_suit_probs if partner_after_me else reversed(solo_suit_probs):
             for rank in (Rank.king, Rank.queen, Rank.nine, Rank.eight, Rank.seven):
-                card = Card(Suit(suit), rank)
+                card = Card(suit, rank)
                 if self.card_positions.player_has_card(self.id, card):
                     return card
 
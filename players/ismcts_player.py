@@ -0,0 +1,134 @@
+import math
+import time
+from typing import Optional
+
+from card import Card, CardInfo
+from .pimc_player import SamplingPlayer, valid_card_ids, random_playout
+
+
+class _Node:
+    __slots__ = ("player", "children", "visits", "reward", "available")
+
+    def __init__(self, player: Optional[int]):
+        # the player who played the card leading to this node
+        self.player = player
+        self.children: dict[int, _Node] = {}
+        self.visits = 0
+        # sum of the rewards of the player over all visits
+        self.reward = 0.0
+        # number of selections in which this node was a valid choice
+        self.available = 0
+
+
+class ISMCTSPlayer(SamplingPlayer):
+    """
+    Single observer information set Monte Carlo tree search player. Every iteration samples a deal of the unknown cards
+    and descends the tree of played cards with the moves that are valid in this deal, using UCB with availability
+    counts. Rewards are the soloist's share of the remaining card points (the defenders get the rest). Played cards
+    advance the root of the tree, so the subtree below the own last move is reused for the next move.
+    """
+
+    def __init__(self, *args, time_limit_ms=100, iterations: Optional[int] = None, exploration=0.7, **kwargs):
+        """
+        :param time_limit_ms: The search time per move in milliseconds.
+        :param iterations: The maximum number of iterations per move (default: only limited by time).
+        :param exploration: The exploration constant of the UCB formula.
+        """
+        super().__init__(*args, **kwargs)
+        self.time_limit_ms = time_limit_ms
+        self.iterations = iterations
+        self.exploration = exploration
+        self.kwargs.update(time_limit_ms=time_limit_ms, iterations=iterations, exploration=exploration)
+        self.root: Optional[_Node] = None
+
+    # --- observer methods ---
+
+    def on_game_start(self, player: int, hand: list[Card]):
+        super().on_game_start(player, hand)
+        self.root = None
+
+    def on_card_played(self, card: Card, player: int):
+        super().on_card_played(card, player)
+        if self.root is not None:
+            self.root = self.root.children.get(card.id)
+
+    # --- playing logic
+
+    def next_card(self, hand: list[Card], valid_cards: list[Card]) -> Card:
+        if len(valid_cards) == 1:
+            return valid_cards[0]
+        if self.root is None:
+            self.root = _Node(None)
+        self.search()
+        children = self.root.children
+        return max(valid_cards, key=lambda card: children[card.id].visits if card.id in children else -1)
+
+    def search(self) -> int:
+        """Runs iterations until the time or iteration limit is reached. :returns: The number of iterations."""
+        deadline = time.monotonic() + self.time_limit_ms / 1000
+        leader = self.stich_leader
+        stich = [card.id for card, _ in self.current_stich]
+        iterations = 0
+        while (self.iterations is None or iterations < self.iterations) and time.monotonic() < deadline:
+            deals = self.sample_deals(1)
+            if not deals:
+                break
+            self.iterate(deals[0], leader, list(stich))
+            iterations += 1
+        return iterations
+
+    def iterate(self, hands: list[int], leader: int, stich: list[int]):
+        card_info = self.card_info
+        soloist = self.soloist
+        points = 0
+        remaining_points = sum(card.reward for card in Card.from_mask(hands[0] | hands[1] | hands[2])) \
+            + sum(Card.from_id(card_id).reward for card_id in stich)
+        node = self.root
+        path = [node]
+        expanded = False
+        while hands[0] | hands[1] | hands[2] and not expanded:
+            player = (leader + len(stich)) % 3
+            valid_ids = valid_card_ids(hands[player], stich, card_info)
+            untried = [card_id for card_id in valid_ids if card_id not in node.children]
+            if untried:
+                card_id = self.random_generator.choice(untried)
+                node.children[card_id] = _Node(player)
+                expanded = True
+            # every child that is valid in this deal was available, including the one just expanded
+            for valid_id in valid_ids:
+                child = node.children.get(valid_id)
+                if child is not None:
+                    child.available += 1
+            if not expanded:
+                card_id = self.select(node, valid_ids)
+            node = node.children[card_id]
+            path.append(node)
+            hands[player] ^= 1 << card_id
+            stich.append(card_id)
+            if len(stich) == 3:
+                leader, stich, stich_points = self.finish_stich(leader, stich, card_info)
+                if leader == soloist:
+                    points += stich_points
+        if hands[0] | hands[1] | hands[2]:
+            points += random_playout(hands, leader, stich, card_info, soloist, self.random_generator)
+
+        solo_reward = points / remaining_points if remaining_points else 0.5
+        for node in path[1:]:
+            node.visits += 1
+            node.reward += solo_reward if node.player == soloist else 1 - solo_reward
+
+    @staticmethod
+    def finish_stich(leader: int, stich: list[int], card_info: CardInfo) -> tuple[int, list[int], int]:
+        """:returns: The winner of the stich, the next empty stich and the card points of the stich."""
+        cards = [Card.from_id(card_id) for card_id in stich]
+        winner = (leader + card_info.stich_winner(*cards)) % 3
+        return winner, [], sum(card.reward for card in cards)
+
+    def select(self, node: _Node, valid_ids: list[int]) -> int:
+        best_id, best_value = None, -math.inf
+        for card_id in valid_ids:
+            child = node.children[card_id]
+            value = child.reward / child.visits + self.exploration * math.sqrt(math.log(child.available) / child.visits)
+            if value > best_value:
+                best_id, best_value = card_id, value
+        return best_id
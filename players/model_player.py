@@ -1,5 +1,3 @@
-import numpy as np
-
 from card import Card
 from training import configs
 from .player import Player
@@ -24,13 +22,13 @@ class ModelPlayer(Player):
         self.name = self.name or f"{config_name}_{env_settings}_{filename.replace('.zip', '')}"
         self.model_observer = config.observer(**config.observer_kwargs)
         self.observers.append(self.model_observer)
+        self._observation_buffer = self.model_observer.flat_encoder.zeros() if config.flat_observation else None
         self.trump_strategy = config.trump_strategy()
-        self.kwargs.update(path=path)
-
-    def _action_masks(self, valid_cards: list[Card]):
-        return np.array([self.model_observer.get_card(action) in valid_cards for action in range(32)])
+        self.kwargs.update(path=path, device=device)
 
     def next_card(self, hand: list[Card], valid_cards: list[Card]):
         action, _ = self.model.predict(
-            self.model_observer.get_observation(), deterministic=True, action_masks=self._action_masks(valid_cards))
+            self.model_observer.observation(self._observation_buffer),
+            deterministic=True,
+            action_masks=self.model_observer.action_masks())
         return self.model_observer.get_card(int(action))
@@ -1,7 +1,6 @@
 import os
 from typing import Optional
 
-import numpy as np
 from stable_baselines3.common.base_class import BaseAlgorithm
 
 from card import Card
@@ -35,6 +34,7 @@ class MultiModelPlayer(Player, Observer):
         self.name = self.name or f"{config_name}_{env_settings}"
         self.model_observer = self.config.observer(**self.config.observer_kwargs)
         self.observers.append(self.model_observer)
+        self._observation_buffer = self.model_observer.flat_encoder.zeros() if self.config.flat_observation else None
         self.trump_strategy = self.config.trump_strategy()
         self.kwargs.update(folder=folder, device=device)
 
@@ -49,9 +49,6 @@ class MultiModelPlayer(Player, Observer):
         else:
             self.position = PlayerPosition.soloist
 
-    def _action_masks(self, valid_cards: list[Card]):
-        return np.array([self.model_observer.get_card(action) in valid_cards for action in range(32)])
-
     def get_model(self):
         if self.models[self.position] is None:
             model_path, _ = find_latest_model(f"{self.folder}/{self.position.name}")
@@ -61,5 +58,7 @@ class MultiModelPlayer(Player, Observer):
 
     def next_card(self, hand: list[Card], valid_cards: list[Card]):
         action, _ = self.get_model().predict(
-            self.model_observer.get_observation(), deterministic=True, action_masks=self._action_masks(valid_cards))
+            self.model_observer.observation(self._observation_buffer),
+            deterministic=True,
+            action_masks=self.model_observer.action_masks())
         return self.model_observer.get_card(int(action))
@@ -0,0 +1,275 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional
+
+from card import Card, Suit, CardInfo
+from skat_solver import DoubleDummySolver
+from .advanced_player import AdvancedPlayer
+
+# index of the skat in the holders of a card
+SKAT = 3
+
+# process pools shared by all players of this process, by number of workers
+_pools: dict[int, ProcessPoolExecutor] = {}
+# tasks of each pool that were still running at the deadline of their move, they keep their workers busy until done
+_stale_futures: dict[int, set[Future]] = {}
+# solvers of a worker process, by trump and soloist
+_solvers: dict[tuple[Suit, int], DoubleDummySolver] = {}
+# the transposition table is cleared when it grows beyond this number of entries
+_max_table_size = 2_000_000
+
+
+def sample_deal(holders: dict[int, list[int]], sizes: list[int], rand_gen: random.Random,
+                attempts=100) -> Optional[list[int]]:
+    """
+    Deals the unknown cards randomly, so that every card gets one of its possible holders and every holder gets the
+    given number of cards. Cards with the fewest possible holders are dealt first.
+    :param holders: The possible holders (players or SKAT) of each unknown card id.
+    :param sizes: The number of unknown cards of the players and the skat.
+    :returns: The card masks of the players and the skat or None if no valid deal was found.
+    """
+    card_ids = sorted(holders, key=lambda card_id: len(holders[card_id]))
+    for _ in range(attempts):
+        remaining = list(sizes)
+        masks = [0] * len(sizes)
+        for card_id in card_ids:
+            options = [holder for holder in holders[card_id] if remaining[holder] > 0]
+            if not options:
+                break
+            holder = rand_gen.choices(options, weights=[remaining[holder] for holder in options])[0]
+            remaining[holder] -= 1
+            masks[holder] |= 1 << card_id
+        else:
+            return masks
+    return None
+
+
+def evaluate_deals(trump: Suit, soloist: int, leader: int, stich: list[int], deals: list[list[int]],
+                   rollouts: int = 0, seed: Optional[int] = None) -> dict[int, int]:
+    """
+    Evaluates the valid cards of the current player on fully known deals.
+    :param deals: The card masks of the players' hands of each deal.
+    :param rollouts: The number of random playouts per card and deal, 0 to solve the deals exactly.
+    :returns: For each valid card id, the soloist points from the current stich on, summed over all deals (and
+    playouts).
+    """
+    totals: dict[int, int] = {}
+    if rollouts:
+        rand_gen = random.Random(seed)
+        card_info = CardInfo(trump)
+        for hands in deals:
+            for card_id, points in _rollout_values(hands, leader, stich, card_info, soloist, rollouts, rand_gen):
+                totals[card_id] = totals.get(card_id, 0) + points
+        return totals
+
+    solver = _solvers.get((trump, soloist))
+    if solver is None:
+        solver = _solvers[trump, soloist] = DoubleDummySolver(trump, soloist, max_table_size=_max_table_size)
+    for hands in deals:
+        for card_id, points in solver.card_values(hands, leader, stich).items():
+            totals[card_id] = totals.get(card_id, 0) + points
+    return totals
+
+
+def _rollout_values(hands: list[int], leader: int, stich: list[int], card_info: CardInfo, soloist: int,
+                    rollouts: int, rand_gen: random.Random):
+    player = (leader + len(stich)) % 3
+    for card_id in valid_card_ids(hands[player], stich, card_info):
+        new_hands = list(hands)
+        new_hands[player] ^= 1 << card_id
+        yield card_id, sum(random_playout(list(new_hands), leader, stich + [card_id], card_info, soloist, rand_gen)
+                           for _ in range(rollouts))
+
+
+def valid_card_ids(hand: int, stich: list[int], card_info: CardInfo) -> list[int]:
+    if stich:
+        hand = hand & card_info.suit_masks[card_info.ingame_suit(Card.from_id(stich[0]))] or hand
+    return [card.id for card in Card.from_mask(hand)]
+
+
+def random_playout(hands: list[int], leader: int, stich: list[int], card_info: CardInfo, soloist: int,
+             rand_gen: random.Random) -> int:
+    """Plays the game to its end with random valid cards. :returns: The soloist points from the current stich on."""
+    points = 0
+    while True:
+        if len(stich) == 3:
+            winner = (leader + card_info.stich_winner(*(Card.from_id(card_id) for card_id in stich))) % 3
+            if winner == soloist:
+                points += sum(Card.from_id(card_id).reward for card_id in stich)
+            if not hands[winner]:
+                return points
+            leader, stich = winner, []
+        player = (leader + len(stich)) % 3
+        card_id = rand_gen.choice(valid_card_ids(hands[player], stich, card_info))
+        hands[player] ^= 1 << card_id
+        stich.append(card_id)
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(workers)
+        _stale_futures[workers] = set()
+    return _pools[workers]
+
+
+class SamplingPlayer(AdvancedPlayer):
+    """
+    Base class of search players that deal the unknown cards randomly, consistent with the card positions tracked by
+    the AdvancedPlayer.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.random_generator = random.Random(self.seed)
+        self.hand_mask = 0
+        # mask of played cards and cards known to be in the skat
+        self.gone_mask = 0
+        self.played_counts = [0, 0, 0]
+
+    def seed_random(self, seed: int):
+        super().seed_random(seed)
+        self.random_generator.seed(seed)
+
+    # --- observer methods ---
+
+    def on_game_start(self, player: int, hand: list[Card]):
+        super().on_game_start(player, hand)
+        self.hand_mask = Card.mask_of(hand)
+        self.gone_mask = 0
+        self.played_counts = [0, 0, 0]
+
+    def on_skat(self, skat: list[Card], new_hand: list[Card]):
+        super().on_skat(skat, new_hand)
+        self.hand_mask = Card.mask_of(new_hand)
+        self.gone_mask |= Card.mask_of(skat)
+
+    def on_card_played(self, card: Card, player: int):
+        super().on_card_played(card, player)
+        self.hand_mask &= ~card.mask
+        self.gone_mask |= card.mask
+        self.played_counts[player] += 1
+
+    # --- playing logic
+
+    @property
+    def stich_leader(self) -> int:
+        return self.current_stich[0][1] if self.current_stich else self.id
+
+    def sample_deals(self, num_deals: int) -> list[list[int]]:
+        """:returns: The card masks of the players' hands for the given number of random deals."""
+        others = [p for p in range(3) if p != self.id]
+        holders = {}
+        for card in Card.from_mask(~(self.hand_mask | self.gone_mask) & 0xFFFFFFFF):
+            holders[card.id] = [p for p in others if self.card_positions.player_has_card(p, card)]
+            if self.id != self.soloist:
+                holders[card.id].append(SKAT)
+        sizes = [0 if p == self.id else 10 - self.played_counts[p] for p in range(3)]
+        sizes.append(0 if self.id == self.soloist else 2)
+
+        deals = []
+        for _ in range(num_deals):
+            masks = sample_deal(holders, sizes, self.random_generator)
+            if masks is None:
+                break
+            masks[self.id] = self.hand_mask
+            deals.append(masks[:3])
+        return deals
+
+
+class PIMCPlayer(SamplingPlayer):
+    """
+    Perfect information Monte Carlo player: evaluates each valid card on randomly sampled deals of the unknown cards and
+    plays the card with the best average soloist points. Deals with few remaining cards are solved exactly with the
+    DoubleDummySolver, earlier ones are evaluated with random playouts. The samples can be spread over a process pool.
+    """
+
+    def __init__(
+            self, *args, samples=20, time_limit: Optional[float] = None, workers=1,
+            solver_cards=18, rollouts=10, **kwargs
+    ):
+        """
+        :param samples: The maximum number of sampled deals per move.
+        :param time_limit: The time in seconds after which no more samples are evaluated for a move (default: none).
+        :param workers: The number of worker processes to evaluate the samples in (default: 1, in this process).
+        Players that run inside worker processes themselves, e.g. of play_runs_parallel or the tournament scheduler,
+        always search in their process, so that the machine is not oversubscribed.
+        :param solver_cards: The number of cards left in the hands from which on deals are solved exactly. Solving
+        complete deals takes seconds each (see DoubleDummySolver), so earlier positions use playouts by default.
+        :param rollouts: The number of random playouts per card and deal that are not solved exactly.
+        """
+        super().__init__(*args, **kwargs)
+        self.samples = samples
+        self.time_limit = time_limit
+        self.workers = workers
+        self.solver_cards = solver_cards
+        self.rollouts = rollouts
+        self.kwargs.update(samples=samples, time_limit=time_limit, workers=workers, solver_cards=solver_cards,
+                           rollouts=rollouts)
+
+    def next_card(self, hand: list[Card], valid_cards: list[Card]) -> Card:
+        if len(valid_cards) == 1:
+            return valid_cards[0]
+        totals, count = self.evaluate(len(hand) * 3 - len(self.current_stich))
+        if count == 0:
+            return super().next_card(hand, valid_cards)
+        best = max if self.id == self.soloist else min
+        return best(valid_cards, key=lambda card: totals[card.id])
+
+    def evaluate(self, cards_left: int) -> tuple[dict[int, int], int]:
+        """:returns: The summed soloist points for each valid card id and the number of evaluated deals."""
+        deadline = None if self.time_limit is None else time.monotonic() + self.time_limit
+        stich = [card.id for card, _ in self.current_stich]
+        rollouts = 0 if cards_left <= self.solver_cards else self.rollouts
+        args = (self.card_info.trump, self.soloist, self.stich_leader, stich)
+        totals: dict[int, int] = {}
+        count = 0
+
+        def add(values: dict[int, int]):
+            for card_id, points in values.items():
+                totals[card_id] = totals.get(card_id, 0) + points
+
+        if self.workers == 1 or multiprocessing.parent_process() is not None:
+            for deal in self.sample_deals(self.samples):
+                if deadline is not None and time.monotonic() > deadline:
+                    break
+                add(evaluate_deals(*args, [deal], rollouts, self.random_generator.getrandbits(32)))
+                count += 1
+            return totals, count
+
+        # each task evaluates one deal and only one task per worker is submitted at a time, so that the time limit
+        # stops the search between deals and leaves at most one running task per worker behind
+        pool = _pool(self.workers)
+        stale = _stale_futures[self.workers]
+        deals = iter(self.sample_deals(self.samples))
+        pending: set[Future] = set()
+        exhausted = False
+
+        def submit():
+            nonlocal exhausted
+            while not exhausted and len(pending) + len(stale) < self.workers:
+                deal = next(deals, None)
+                if deal is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(
+                        evaluate_deals, *args, [deal], rollouts, self.random_generator.getrandbits(32)))
+
+        submit()
+        while pending or stale and not exhausted:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = wait(pending | stale, timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in stale:
+                    # the result of an earlier move is ignored, but its worker is free again
+                    stale.remove(future)
+                else:
+                    pending.remove(future)
+                    add(future.result())
+                    count += 1
+            if deadline is not None and time.monotonic() > deadline:
+                stale.update(pending)
+                break
+            submit()
+        return totals, count
@@ -2,6 +2,7 @@ from typing import Optional
 
 from card import Card, Suit
 from observers import Observer
+from skat_deals import game_seed
 from players.trump_strategies import RandomTrumpStrategy, TrumpStrategy
 
 
@@ -22,6 +23,18 @@ class Player:
     def next_card(self, hand: list[Card], valid_cards: list[Card]) -> Card:
         raise NotImplementedError
 
+    def seed_game(self, game_index: int):
+        """
+        Reseeds the random generators of a seeded player for the game, so that every game is played the same way
+        regardless of the games played before it.
+        """
+        if self.seed is not None:
+            self.seed_random(game_seed(self.seed, game_index))
+
+    def seed_random(self, seed: int):
+        if self.trump_strategy is not None:
+            self.trump_strategy.seed_random(seed)
+
     def choose_trump_and_skat(self, hand: list[Card], skat: list[Card]) -> tuple[Suit, list[Card]]:
         return self.trump_strategy.choose_trump_and_skat(hand, skat)
 
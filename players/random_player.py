@@ -11,5 +11,9 @@ class RandomPlayer(Player):
         self.random_generator = random.Random(self.seed)
         self.trump_strategy = self.trump_strategy or RandomTrumpStrategy(self.seed)
 
+    def seed_random(self, seed: int):
+        super().seed_random(seed)
+        self.random_generator.seed(seed)
+
     def next_card(self, hand: list[Card], valid_cards: list[Card]):
         return self.random_generator.choice(valid_cards)
@@ -8,6 +8,9 @@ class TrumpStrategy:
     def choose_trump_and_skat(self, hand: list[Card], skat: list[Card]) -> tuple[Suit, list[Card]]:
         raise NotImplementedError
 
+    def seed_random(self, seed: int):
+        pass
+
 
 class RandomTrumpStrategy(TrumpStrategy):
     def __init__(self, seed: Optional[int]):
@@ -16,6 +19,9 @@ class RandomTrumpStrategy(TrumpStrategy):
     def choose_trump_and_skat(self, hand: list[Card], skat: list[Card]) -> tuple[Suit, list[Card]]:
         return self.random_generator.choice(list(Suit)), skat
 
+    def seed_random(self, seed: int):
+        self.random_generator.seed(seed)
+
 
 class FixedTrumpStrategy(TrumpStrategy):
     def choose_trump_and_skat(self, hand: list[Card], skat: list[Card]) -> tuple[Suit, list[Card]]:
@@ -0,0 +1,149 @@
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+from typing import Iterable, Iterator
+
+from players import Player
+from skat_env import PlayerPosition
+from training.utility import find_latest_model
+
+# player kwargs that do not change how a player plays
+_IGNORED_KWARGS = {"name", "device", "trump_strategy"}
+
+
+def _file_digest(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _checkpoint_digests(player: Player) -> dict[str, str]:
+    """:returns: The digests of the model files of the player by relative path."""
+    path = player.kwargs.get("path")
+    if path is not None:
+        filename = path if os.path.isfile(path) else f"{path}.zip"
+        return {"": _file_digest(filename)}
+    folder = player.kwargs.get("folder")
+    if folder is not None:
+        # only the latest model of each position is loaded, older checkpoints and monitor files do not matter
+        digests = {}
+        for position in PlayerPosition:
+            model_path, _ = find_latest_model(f"{folder}/{position.name}")
+            if model_path is not None:
+                digests[os.path.relpath(model_path, folder)] = _file_digest(model_path)
+        return digests
+    return {}
+
+
+# source digests by class, computed once per process
+_code_digests: dict[type, str] = {}
+
+
+def _code_digest(cls: type) -> str:
+    """:returns: The digest of the source files of the class and its base classes, which changes with their code."""
+    if cls not in _code_digests:
+        digest = hashlib.sha256()
+        filenames = set()
+        for base in cls.__mro__:
+            try:
+                filenames.add(inspect.getsourcefile(base))
+            except TypeError:
+                # built-in classes have no source file
+                pass
+        for filename in sorted(filter(None, filenames)):
+            digest.update(_file_digest(filename).encode())
+        _code_digests[cls] = digest.hexdigest()
+    return _code_digests[cls]
+
+
+def player_identity(player: Player) -> dict:
+    """
+    :returns: Everything that determines how the player plays: class and its code, kwargs, model files and trump
+    strategy.
+    """
+    player_class = player.__class__
+    return {
+        "class": f"{player_class.__module__}.{player_class.__qualname__}",
+        "code": _code_digest(player_class),
+        "kwargs": {key: repr(value) for key, value in sorted(player.kwargs.items()) if key not in _IGNORED_KWARGS},
+        "checkpoints": _checkpoint_digests(player),
+        "trump_strategy": type(player.trump_strategy).__qualname__,
+        "trump_strategy_code": _code_digest(type(player.trump_strategy)),
+    }
+
+
+def matchup_key(soloist: Player, opponents: list[Player], seed: int) -> str:
+    """:returns: The content hash of the players and the seed of the dealt games."""
+    identity = {"soloist": player_identity(soloist), "opponents": [player_identity(p) for p in opponents], "seed": seed}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Stores the results of simulated games in a SQLite database, indexed by matchup key and run, so that games are only
+    simulated once for the same players and seed. The columns follow RESULT_DTYPE.
+    """
+
+    def __init__(self, filename="logs/results.sqlite"):
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "matchup TEXT NOT NULL, run INTEGER NOT NULL, total_reward INTEGER NOT NULL, trump INTEGER NOT NULL, "
+            "soloist_trumps INTEGER NOT NULL, soloist_hand_points INTEGER NOT NULL, soloist_stiche INTEGER NOT NULL, "
+            "decision_time_0 REAL NOT NULL, decision_time_1 REAL NOT NULL, decision_time_2 REAL NOT NULL, "
+            "PRIMARY KEY (matchup, run)) WITHOUT ROWID"
+        )
+        self.connection.commit()
+
+    def load(self, matchup: str, runs: Iterable[int]) -> dict[int, tuple]:
+        """:returns: The cached results of the given runs of the matchup by run."""
+        runs = set(runs)
+        if not runs:
+            return {}
+        rows = self.connection.execute(
+            "SELECT * FROM results WHERE matchup = ? AND run BETWEEN ? AND ?", (matchup, min(runs), max(runs)))
+        return {
+            row[1]: row[1:7] + (list(row[7:10]),)
+            for row in rows if row[1] in runs
+        }
+
+    def store(self, matchup: str, results: list[tuple]):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(matchup, *map(int, result[:6]), *map(float, result[6])) for result in results]
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def merge_cached(runs: list[int], cached: dict[int, tuple], simulated: Iterator[tuple], cache: ResultCache,
+                 matchup: str, commit_interval=1000) -> Iterator[tuple]:
+    """
+    :param simulated: The generator of the results of the runs that are not cached, in order.
+    :returns: The results of all runs in order. New results are stored in the cache.
+    """
+    new_results = []
+    try:
+        for run in runs:
+            if run in cached:
+                yield cached[run]
+            else:
+                result = next(simulated)
+                new_results.append(result)
+                if len(new_results) == commit_interval:
+                    cache.store(matchup, new_results)
+                    new_results = []
+                yield result
+    finally:
+        # also keeps the new results if the caller stops early
+        simulated.close()
+        cache.store(matchup, new_results)
@@ -0,0 +1,90 @@
+import os
+import random
+from typing import Optional
+
+import numpy as np
+
+from card import Card
+
+_MASK_64 = (1 << 64) - 1
+_GAMMA = 0x9E3779B97F4A7C15
+# random words per game: three for the card permutation (192 bits, so the bias towards some of the 32! permutations
+# is negligible) and a fourth word that is unused and only kept so that existing seeds keep their deals
+_WORDS_PER_GAME = 4
+
+
+def _mix(z: int) -> int:
+    # finalizer of SplitMix64
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & _MASK_64
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EB & _MASK_64
+    return z ^ (z >> 31)
+
+
+def _words(seed: int, game_index: int) -> list[int]:
+    key = _mix(seed & _MASK_64)
+    counter = game_index * _WORDS_PER_GAME
+    return [_mix((key + (counter + i + 1) * _GAMMA) & _MASK_64) for i in range(_WORDS_PER_GAME)]
+
+
+def unrank_permutation(rank: int, size=32) -> list[int]:
+    """:returns: The permutation of range(size) that the Fisher-Yates shuffle creates if rank gives its swaps."""
+    permutation = list(range(size))
+    for i in range(size - 1, 0, -1):
+        rank, j = divmod(rank, i + 1)
+        permutation[i], permutation[j] = permutation[j], permutation[i]
+    return permutation
+
+
+def deal_ids(seed: int, game_index: int) -> list[int]:
+    """
+    :returns: The card ids of game number game_index of the seed in dealt order (see SkatGame). Every game is computed
+    directly from seed and index, so any subset of games can be dealt in any order.
+    """
+    words = _words(seed, game_index)
+    return unrank_permutation(words[0] << 128 | words[1] << 64 | words[2])
+
+
+def deal(seed: int, game_index: int) -> list[Card]:
+    return [Card.from_id(card_id) for card_id in deal_ids(seed, game_index)]
+
+
+def game_seed(seed: int, game_index: int) -> int:
+    """:returns: A seed for the random generators of the players in a game, independent of the deal."""
+    return _mix((_mix(~seed & _MASK_64) + (game_index + 1) * _GAMMA) & _MASK_64)
+
+
+def resolve_seed(seed: Optional[int]) -> int:
+    """:returns: The seed or a random one if it is None."""
+    return random.getrandbits(64) if seed is None else seed
+
+
+# a deal bank holds the deals of the games 0, 1, ... of a seed
+DEAL_BANK_DTYPE = np.dtype([("deal", np.uint8, 32)])
+
+
+def deal_bank_filename(seed: int, count: int, directory="logs/deals") -> str:
+    return f"{directory}/deals-{seed}-{count}.npy"
+
+
+def deal_bank(seed: int, count: int, directory="logs/deals") -> np.ndarray:
+    """
+    Loads the deals of the first count games of the seed as read-only memory-mapped array with DEAL_BANK_DTYPE. The
+    bank file is generated on first use, so all users of the same seed and count share one file.
+    """
+    filename = deal_bank_filename(seed, count, directory)
+    if not os.path.isfile(filename):
+        bank = np.zeros(count, dtype=DEAL_BANK_DTYPE)
+        for game_index in range(count):
+            bank[game_index]["deal"] = deal_ids(seed, game_index)
+        os.makedirs(directory, exist_ok=True)
+        # write to a temporary file first, so that concurrent users never see a partial bank
+        temp_filename = f"{filename}.{os.getpid()}.tmp"
+        with open(temp_filename, "wb") as file:
+            np.save(file, bank)
+        os.replace(temp_filename, filename)
+    return np.load(filename, mmap_mode="r")
+
+
+def bank_deal(bank: np.ndarray, game_index: int) -> list[Card]:
+    """:returns: The cards of a game of the bank in dealt order, equal to deal(seed, game_index)."""
+    return [Card.from_id(card_id) for card_id in bank["deal"][game_index].tolist()]
@@ -5,13 +5,12 @@ from random import Random
 from typing import Optional, Type
 
 import gym
-import numpy as np
 
 from card import Card
 from observers import ModelObserver
 from players import Player
 from players.trump_strategies import TrumpStrategy
-from skat_game import SkatGame, PlayerParty
+from skat_game import SkatGame, PlayerParty, BitboardSkatGame
 
 
 class PlayerPosition(IntEnum):
@@ -40,12 +39,20 @@ class SkatEnv(gym.Env):
         successor: Player,
         observer: ModelObserver,
         trump_strategy: TrumpStrategy,
+        bitboard=False,
+        # return observations flat (see BasicModelObserver.flat_encoder) instead of as dict
+        flat_observation=False,
     ):
         self.observer = observer
         self.action_space = self.observer.action_space
-        self.observation_space = self.observer.observation_space
+        self.observation_space = \
+            self.observer.flat_encoder.observation_space if flat_observation else self.observer.observation_space
+        # flat observations are written into this buffer and returned, so callers that keep them have to copy them;
+        # a vectorized environment may replace it by a row of its batch buffer
+        self.observation_buffer = self.observer.flat_encoder.zeros() if flat_observation else None
 
         self.game: Optional[SkatGame] = None
+        self.game_class = BitboardSkatGame if bitboard else SkatGame
         self.other_players = [successor, predecessor]
         self.trump_strategy = trump_strategy
         self.player_id = 2
@@ -62,13 +69,18 @@ class SkatEnv(gym.Env):
             player = self.other_players[self.game.current_player]
             self._play_card(player.next_card(self.game.current_hand, self.game.current_valid_cards))
 
+    def seed(self, seed=None):
+        """Seeds the deals of the following games, the seed is used by the next reset (old gym API used by SB3)."""
+        self.rand = Random(seed)
+        return [seed]
+
     def reset(self, seed=None):
         if seed is not None:
             self.rand = Random(seed)
         else:
             self.rand = self.rand or Random(os.urandom(128))
 
-        self.game = SkatGame(self.rand, self.rand.randint(0, 2))
+        self.game = self.game_class(self.rand, self.rand.randint(0, 2))
         for player_id, player in enumerate(self.other_players):
             for observer in player.observers:
                 self.game.add_observer(observer, player_id)
@@ -87,18 +99,17 @@ class SkatEnv(gym.Env):
 
         self.game.set_bid_results(trump, soloist, skat)
         self._play_until_agent_turn()
-        return self.observer.get_observation()
+        return self.observer.observation(self.observation_buffer)
 
     def step(self, action: int):
         card = self.observer.get_card(action)
         self._play_card(card)
         self._play_until_agent_turn()
         reward = self.observer.get_reward()
-        return self.observer.get_observation(), reward, self.game.done, {}
+        return self.observer.observation(self.observation_buffer), reward, self.game.done, {}
 
     def action_masks(self):
-        valid_cards = self.game.current_valid_cards
-        return np.array([self.observer.get_card(action) in valid_cards for action in range(32)])
+        return self.observer.action_masks()
 
     def render(self, mode="ansi"):
         if mode == "ansi":
@@ -1,6 +1,6 @@
 from enum import IntEnum
 from random import Random
-from typing import Optional
+from typing import Callable, Optional
 
 from card import Card, Suit, CardInfo
 from observers import Observer
@@ -22,10 +22,18 @@ class SkatGame:
     def prev_player(player: int):
         return (player + 2) % 3
 
-    def __init__(self, rand_gen=Random(), start_player=0):
+    def __init__(self, rand_gen=Random(), start_player=0, deal: Optional[list[Card]] = None):
+        """
+        :param rand_gen: The random generator to shuffle the cards with.
+        :param start_player: The player to play the first card.
+        :param deal: All cards in dealt order, the cards are not shuffled if given.
+        """
         super().__init__()
-        self.cards = list(Card.all())
-        rand_gen.shuffle(self.cards)
+        if deal is None:
+            self.cards = list(Card.all())
+            rand_gen.shuffle(self.cards)
+        else:
+            self.cards = list(deal)
         self.hands = [self.cards[0:10], self.cards[10:20], self.cards[20:30]]
         self.skat = self.cards[30:32]
         self.card_info: Optional[CardInfo] = None
@@ -39,9 +47,23 @@ class SkatGame:
         self.current_player = start_player
 
         self._observers: list[tuple[Observer, int]] = []
+        # card events are only dispatched to the observers that override the handler
+        self._card_played_handlers: list[Callable[[Card, int], None]] = []
+        self._stich_made_handlers: list[Callable[[int, int], None]] = []
+        self._stich_complete_handlers: list[Callable[[Stich, int, int], None]] = []
+        # (card, player, index in hand, stich value or None if the card did not complete a stich) of each played card
+        self._moves: list[tuple[Card, int, int, Optional[int]]] = []
 
     def add_observer(self, observer: Observer, player_id: int):
         self._observers.append((observer, player_id))
+        for handlers, event in (
+                (self._card_played_handlers, "on_card_played"),
+                (self._stich_made_handlers, "on_stich_made"),
+                (self._stich_complete_handlers, "on_stich_complete"),
+        ):
+            handler = observer.handler(event)
+            if handler is not None:
+                handlers.append(handler)
         observer.on_game_start(player_id, self.hands[player_id])
 
     def set_bid_results(self, trump: Suit, soloist: int, skat: list[Card]):
@@ -86,33 +108,150 @@ class SkatGame:
         suit_following_cards = [card for card in self.current_hand if self.follows_suit(card)]
         return suit_following_cards or self.current_hand
 
+    def is_valid(self, card: Card) -> bool:
+        return card in self.current_valid_cards
+
     def winner(self, stich: Stich) -> int:
         assert len(stich) == 3
-        leading_suit = self.card_info.ingame_suit(stich[0][0])
-        return max(stich, key=lambda card_player: self.card_info.ingame_strength(card_player[0], leading_suit))[1]
+        return stich[self.card_info.stich_winner(stich[0][0], stich[1][0], stich[2][0])][1]
 
     def play_card(self, card: Card):
         if self.done:
             raise RuntimeError("Game is already over")
-        elif card not in self.current_valid_cards:
+        elif not self.is_valid(card):
             raise ValueError(f"Card {card} is not valid")
         else:
-            self.current_hand.remove(card)
-            self.current_stich.append((card, self.current_player))
-            for observer, _ in self._observers:
-                observer.on_card_played(card, self.current_player)
-            if len(self.current_stich) == 3:
-                winner = self.winner(self.current_stich)
-                stich_value = sum(c.reward for c, _ in self.current_stich)
-                for observer, _ in self._observers:
-                    observer.on_stich_made(winner, stich_value)
-                self.points[self.player_parties[winner]] += stich_value
-                self.stich_list.append([])
-                self.current_player = winner
-            else:
-                self.current_player = self.next_player(self.current_player)
+            player = self.current_player
+            self.apply(card)
+            for handler in self._card_played_handlers:
+                handler(card, player)
+            if len(self.current_stich) == 0:
+                winner = self.current_player
+                stich_value = self._moves[-1][3]
+                for handler in self._stich_made_handlers:
+                    handler(winner, stich_value)
+                if self._stich_complete_handlers:
+                    stich = self.stich_list[-2].copy()
+                    for handler in self._stich_complete_handlers:
+                        handler(stich, winner, stich_value)
+
+    def apply(self, card: Card):
+        """Plays a valid card without notifying the observers. The move can be reverted with undo."""
+        player = self.current_player
+        hand = self.hands[player]
+        hand_index = hand.index(card)
+        del hand[hand_index]
+        stich = self.stich_list[-1]
+        stich.append((card, player))
+        if len(stich) == 3:
+            winner = self.winner(stich)
+            stich_value = stich[0][0].reward + stich[1][0].reward + stich[2][0].reward
+            self.points[self.player_parties[winner]] += stich_value
+            self.stich_list.append([])
+            self.current_player = winner
+        else:
+            stich_value = None
+            self.current_player = self.next_player(player)
+        self._moves.append((card, player, hand_index, stich_value))
+
+    def undo(self) -> Card:
+        """Reverts the last played card (observers are not notified). :returns: The card that was taken back."""
+        card, player, hand_index, stich_value = self._moves.pop()
+        if stich_value is not None:
+            self.stich_list.pop()
+            self.points[self.player_parties[self.current_player]] -= stich_value
+        self.stich_list[-1].pop()
+        self.hands[player].insert(hand_index, card)
+        self.current_player = player
+        return card
+
+    def snapshot(self) -> tuple:
+        """:returns: A copy of the state changed by playing cards, which can be passed to restore."""
+        return (
+            [hand.copy() for hand in self.hands],
+            [stich.copy() for stich in self.stich_list],
+            self.points.copy(),
+            self.current_player,
+            self._moves.copy(),
+        )
+
+    def restore(self, state: tuple):
+        """Resets the game to a snapshot (observers are not notified). The snapshot can be restored again later."""
+        hands, stich_list, points, self.current_player, moves = state[:5]
+        self.hands = [hand.copy() for hand in hands]
+        self.stich_list = [stich.copy() for stich in stich_list]
+        self.points = points.copy()
+        self._moves = moves.copy()
 
     def winning_party(self):
         if not self.done:
             return None
         return PlayerParty.soloist if self.points[PlayerParty.soloist] > 60 else PlayerParty.defenders
+
+
+class BitboardSkatGame(SkatGame):
+    """
+    Skat game that additionally keeps hands, skat and played cards as 32 bit card masks (see Card.mask), so that valid
+    cards are determined with a few mask operations. Deals and card orders equal those of SkatGame.
+    """
+
+    def __init__(self, rand_gen=Random(), start_player=0, deal: Optional[list[Card]] = None):
+        super().__init__(rand_gen, start_player, deal)
+        self.hand_masks = [Card.mask_of(hand) for hand in self.hands]
+        self.skat_mask = Card.mask_of(self.skat)
+        self.played_mask = 0
+        # mask of the leading ingame suit in the current stich, 0 if no card was played yet
+        self._leading_mask = 0
+
+    def _set_skat(self, skat: list[Card]):
+        super()._set_skat(skat)
+        self.hand_masks[self.soloist] = Card.mask_of(self.hands[self.soloist])
+        self.skat_mask = Card.mask_of(skat)
+
+    @property
+    def current_hand_mask(self) -> int:
+        return self.hand_masks[self.current_player]
+
+    @property
+    def current_valid_mask(self) -> int:
+        hand_mask = self.hand_masks[self.current_player]
+        return hand_mask & self._leading_mask or hand_mask
+
+    def follows_suit(self, card: Card):
+        return not self._leading_mask or card.mask & self._leading_mask != 0
+
+    @property
+    def current_valid_cards(self) -> list[Card]:
+        valid_mask = self.current_valid_mask
+        return [card for card in self.current_hand if card.mask & valid_mask]
+
+    def is_valid(self, card: Card) -> bool:
+        return card.mask & self.current_valid_mask != 0
+
+    def _update_leading_mask(self):
+        stich = self.current_stich
+        self._leading_mask = self.card_info.suit_masks[self.card_info.ingame_suit(stich[0][0])] if stich else 0
+
+    def apply(self, card: Card):
+        player = self.current_player
+        super().apply(card)
+        self.hand_masks[player] ^= card.mask
+        self.played_mask |= card.mask
+        if len(self.current_stich) <= 1:
+            self._update_leading_mask()
+
+    def undo(self) -> Card:
+        card = super().undo()
+        self.hand_masks[self.current_player] |= card.mask
+        self.played_mask ^= card.mask
+        if len(self.current_stich) != 1:
+            self._update_leading_mask()
+        return card
+
+    def snapshot(self) -> tuple:
+        return super().snapshot() + (self.hand_masks.copy(), self.played_mask, self._leading_mask)
+
+    def restore(self, state: tuple):
+        super().restore(state)
+        hand_masks, self.played_mask, self._leading_mask = state[5:]
+        self.hand_masks = hand_masks.copy()
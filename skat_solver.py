@@ -0,0 +1,444 @@
+from typing import Optional
+
+from card import Card, CardInfo, Suit, IngameSuit, STRENGTH_TABLE, STICH_WINNER_TABLE
+from skat_game import SkatGame, PlayerParty
+
+_rewards = [card.reward for card in Card.all()]
+
+
+class DoubleDummySolver:
+    """
+    Computes the card points of the soloist under optimal play of both parties, if all hands are known.
+    The exact value is found with null window alpha-beta searches that bisect the possible points. A transposition
+    table stores bounds at the beginning of each stich, keyed on the order of the remaining cards of each suit and their
+    owners, so a solver can be reused for any deal with the same trump and soloist. The non-trump suits are
+    interchangeable in these keys, and new entries start with the bounds of the stiche that are sure for one party (see
+    _quick_bounds). Cards of one hand that are adjacent in strength and have the same reward are searched only once,
+    moves are ordered by simple Skat heuristics and the best first card of a stich from the table, and the last card of
+    a stich looks up the bounds of the following positions before searching any of them.
+    """
+
+    def __init__(self, trump: Suit, soloist: int, max_table_size: Optional[int] = None):
+        """
+        :param max_table_size: The transposition table and caches are cleared before a solve once the table has more
+        entries than this (default: never).
+        """
+        self.trump = trump
+        self.soloist = soloist
+        self.max_table_size = max_table_size
+        card_info = CardInfo(trump)
+        self._suit_masks = card_info.suit_masks
+        self._ingame_suits = [card_info.ingame_suit(card) for card in Card.all()]
+        self._stich_winners = STICH_WINNER_TABLE[trump].reshape(-1).tolist()
+        # card ids of each ingame suit by descending strength
+        self._suit_orders = [
+            sorted((card_id for card_id in range(32) if self._ingame_suits[card_id] == ingame_suit),
+                   key=lambda card_id: -STRENGTH_TABLE[trump, ingame_suit, card_id])
+            for ingame_suit in IngameSuit
+        ]
+        self._strengths = STRENGTH_TABLE[trump].tolist()
+        # (card order, mask, cache of moves) of the ingame suits that contain cards
+        self._used_suits = [
+            (suit_order, suit_mask, {}) for suit_order, suit_mask in zip(self._suit_orders, self._suit_masks) if suit_mask
+        ]
+        # maps the remaining hands and leading player to lower and upper bounds of the soloist's remaining points
+        # and the best known first card of the stich
+        self._table: dict[int, tuple[int, int, Optional[int]]] = {}
+        # normalized table keys of the hands and leading player, see _suit_key
+        self._keys: dict[int, int] = {}
+        self._suit_keys: dict[int, int] = {}
+        self._suit_orders_ids: dict[tuple, int] = {}
+        # lengths, sure points and trump runs of the suit orders by suit key, see _suit_summary
+        self._suit_summaries: list[tuple] = []
+        self.nodes = 0
+
+    def clear(self):
+        """Frees the transposition table and cached keys and moves."""
+        self._table.clear()
+        self._keys.clear()
+        self._suit_keys.clear()
+        self._suit_orders_ids.clear()
+        self._suit_summaries.clear()
+        for _, _, suit_moves in self._used_suits:
+            suit_moves.clear()
+
+    def solve(self, hands: list[int], leader: int, stich: Optional[list[int]] = None) -> int:
+        """
+        :param hands: The card masks of the players' hands.
+        :param leader: The player that played or plays the first card of the current stich.
+        :param stich: The ids of the cards already played in the current stich.
+        :returns: The card points the soloist gets from the current and all following stiche.
+        """
+        stich = stich or []
+        if self.max_table_size is not None and len(self._table) > self.max_table_size:
+            self.clear()
+        h0, h1, h2 = hands
+        remaining_points = _mask_points(h0 | h1 | h2) + sum(_rewards[card_id] for card_id in stich)
+        return self._bisect(lambda alpha, beta: self._search(h0, h1, h2, leader, stich, alpha, beta), remaining_points)
+
+    def card_values(self, hands: list[int], leader: int, stich: Optional[list[int]] = None) -> dict[int, int]:
+        """:returns: For each valid card id of the current player, the soloist points after playing it."""
+        stich = stich or []
+        player = (leader + len(stich)) % 3
+        values = {}
+        for card_id in self._valid_ids(hands[player], stich):
+            new_hands = list(hands)
+            new_hands[player] ^= 1 << card_id
+            values[card_id] = self.solve(new_hands, leader, stich + [card_id]) if len(stich) < 2 \
+                else self._finish_stich(new_hands, leader, stich + [card_id])
+        return values
+
+    def _finish_stich(self, hands: list[int], leader: int, stich: list[int]) -> int:
+        first, second, third = stich
+        winner = (leader + self._stich_winners[(first * 32 + second) * 32 + third]) % 3
+        points = _rewards[first] + _rewards[second] + _rewards[third] if winner == self.soloist else 0
+        return points + self.solve(hands, winner)
+
+    def solve_game(self, game: SkatGame) -> int:
+        """:returns: The total card points of the soloist if the game is continued optimally by all players."""
+        assert game.soloist == self.soloist and game.card_info.trump == self.trump
+        stich = game.current_stich
+        leader = stich[0][1] if stich else game.current_player
+        hands = [Card.mask_of(hand) for hand in game.hands]
+        return game.points[PlayerParty.soloist] + self.solve(hands, leader, [card.id for card, _ in stich])
+
+    @staticmethod
+    def _bisect(search, remaining_points: int) -> int:
+        # null window searches that halve the interval of possible values, the table keeps the bounds between them
+        lower, upper = 0, remaining_points
+        threshold = (lower + upper + 1) // 2
+        tested_upper = False
+        while lower < upper:
+            value = search(threshold - 1, threshold)
+            if value >= threshold:
+                lower = value
+                threshold = (lower + upper + 1) // 2
+            else:
+                upper = value
+                # the returned upper bound is often exact, which is proven by a single search at the bound, but only
+                # tried once in a row, so a loose bound does not step down slowly
+                threshold = (lower + upper + 1) // 2 if tested_upper else upper
+                tested_upper = not tested_upper
+            threshold = max(lower + 1, threshold)
+        return lower
+
+    def _search(self, h0: int, h1: int, h2: int, leader: int, stich: list[int], alpha: int, beta: int) -> int:
+        if len(stich) == 0:
+            return self._start_stich(h0, h1, h2, leader, alpha, beta)
+        elif len(stich) == 1:
+            return self._second(h0, h1, h2, leader, stich[0], alpha, beta)
+        else:
+            return self._third(h0, h1, h2, leader, stich[0], stich[1], alpha, beta)
+
+    def _valid_ids(self, hand: int, stich: list[int]) -> list[int]:
+        valid = hand
+        if stich:
+            valid = hand & self._suit_masks[self._ingame_suits[stich[0]]] or hand
+        return [card_id for card_id in range(32) if valid >> card_id & 1]
+
+    def _moves(self, valid: int, blocking: int) -> list[int]:
+        """
+        :returns: The valid card ids to search, skipping cards that are equivalent to the stronger neighbour in the
+        same hand (same reward and no card in another hand or the current stich in between).
+        """
+        moves = []
+        for suit_order, suit_mask, suit_moves in self._used_suits:
+            suit_valid = valid & suit_mask
+            if suit_valid:
+                key = suit_valid | (blocking & suit_mask) << 32
+                cached = suit_moves.get(key)
+                if cached is None:
+                    cached = suit_moves[key] = self._suit_moves(suit_order, suit_valid, blocking)
+                moves.extend(cached)
+        return moves
+
+    @staticmethod
+    def _suit_moves(suit_order: list[int], valid: int, blocking: int) -> tuple[int, ...]:
+        moves = []
+        previous_reward = None
+        for card_id in suit_order:
+            if valid >> card_id & 1:
+                reward = _rewards[card_id]
+                if reward != previous_reward:
+                    moves.append(card_id)
+                    previous_reward = reward
+            elif blocking >> card_id & 1:
+                previous_reward = None
+        return tuple(moves)
+
+    def _order_leading(self, moves: list[int], hand: int, remaining: int):
+        """Sorts moves of the leading player: cards that no other player can beat within their suit come first."""
+        top_cards = 0
+        for suit_order, suit_mask, _ in self._used_suits:
+            if hand & suit_mask:
+                for card_id in suit_order:
+                    if hand >> card_id & 1:
+                        top_cards |= 1 << card_id
+                    elif remaining >> card_id & 1:
+                        break
+        moves.sort(key=lambda card_id: not top_cards >> card_id & 1)
+
+    def _order_following(self, moves: list[int], player: int, winner: int, strengths: list[int],
+                         winning_strength: int):
+        """Sorts moves of a following player: smear points on a partner's stich, otherwise try to win cheaply."""
+        if (winner == self.soloist) == (player == self.soloist):
+            moves.sort(key=lambda card_id: -_rewards[card_id])
+        else:
+            moves.sort(key=lambda card_id: _rewards[card_id] + (100 if strengths[card_id] < winning_strength else 0))
+
+    def _start_stich(self, h0: int, h1: int, h2: int, leader: int, alpha: int, beta: int) -> int:
+        remaining = h0 | h1 | h2
+        if not h0 & (h0 - 1):
+            # only the last stich is left, it is forced
+            if not remaining:
+                return 0
+            first, second, third = ((h0, h1, h2)[(leader + index) % 3].bit_length() - 1 for index in range(3))
+            winner = (leader + self._stich_winners[(first * 32 + second) * 32 + third]) % 3
+            return _mask_points(remaining) if winner == self.soloist else 0
+        hands_key = h0 | h1 << 32 | h2 << 64 | leader << 96
+        key = self._keys.get(hands_key)
+        if key is None:
+            suit_ids = self._suit_ids(h0, h1, h2)
+            key = self._keys[hands_key] = self._table_key(leader, suit_ids)
+            if key not in self._table:
+                # the sure points bound the search until the position is searched
+                self._table[key] = (*self._quick_bounds(leader, suit_ids, remaining), None)
+        lower, upper, best_move = self._table[key]
+        if lower >= beta or lower == upper:
+            return lower
+        if upper <= alpha:
+            return upper
+        window_alpha = max(alpha, lower)
+        window_beta = min(beta, upper)
+        value, best_move = self._lead(h0, h1, h2, leader, best_move, window_alpha, window_beta)
+        if value <= window_alpha:
+            upper = value
+        elif value >= window_beta:
+            lower = value
+        else:
+            lower = upper = value
+        self._table[key] = (lower, upper, best_move)
+        return value
+
+    def _suit_ids(self, h0: int, h1: int, h2: int) -> list[int]:
+        """:returns: The suit key of each used suit, the trump suit last (see IngameSuit)."""
+        return [
+            self._suit_key(suit_order, h0 & suit_mask, h1 & suit_mask, h2 & suit_mask)
+            for suit_order, suit_mask, _ in self._used_suits
+        ]
+
+    def _table_key(self, leader: int, suit_ids: list[int]) -> int:
+        """
+        :returns: The transposition table key of the hands and leading player. The non-trump suits are interchangeable,
+        so their suit keys are sorted and hands that only differ by a permutation of these suits share an entry.
+        """
+        key = leader
+        for suit_id in sorted(suit_ids[:-1]) + suit_ids[-1:]:
+            key = key << 20 | suit_id
+        return key
+
+    def _quick_bounds(self, leader: int, suit_ids: list[int], remaining: int) -> tuple[int, int]:
+        """
+        :returns: A lower and upper bound of the soloist's remaining points from the stiche that are sure for one
+        party: the highest remaining trumps of one party win their stiche whoever leads, and the leader wins the stiche
+        it leads with its highest trumps and then with the highest cards of a suit as long as every opponent has to
+        follow the suit or has no trumps left.
+        """
+        trump_lengths, trump_top_points, run_party, run_points = self._suit_summaries[suit_ids[-1]]
+        sure_points = [0, 0]
+        if run_party is not None:
+            sure_points[run_party] = run_points
+        leader_party = int(leader == self.soloist)
+        opponents = [player for player in range(3) if int(player == self.soloist) != leader_party]
+        # the leader's highest trumps are part of the run, they draw the trumps of the opponents
+        trump_leads = len(trump_top_points[leader]) - 1
+        trumped = [opponent for opponent in opponents if trump_lengths[opponent] > trump_leads]
+        for suit_id in suit_ids[:-1]:
+            lengths, top_points, _, _ = self._suit_summaries[suit_id]
+            leads = len(top_points[leader]) - 1
+            for opponent in trumped:
+                leads = min(leads, lengths[opponent])
+            sure_points[leader_party] += top_points[leader][leads]
+        return sure_points[1], _mask_points(remaining) - sure_points[0]
+
+    def _suit_key(self, suit_order: list[int], h0: int, h1: int, h2: int) -> int:
+        """
+        :returns: An id for the cards of one ingame suit that are still in the hands. Distributions that only differ in
+        cards that were already played get the same id, as only the order of the remaining cards matters.
+        """
+        hands_key = h0 | h1 << 32 | h2 << 64
+        suit_key = self._suit_keys.get(hands_key)
+        if suit_key is None:
+            remaining = h0 | h1 | h2
+            order = tuple(
+                (0 if h0 >> card_id & 1 else 1 if h1 >> card_id & 1 else 2, _rewards[card_id])
+                for card_id in suit_order if remaining >> card_id & 1
+            )
+            suit_key = self._suit_orders_ids.get(order)
+            if suit_key is None:
+                suit_key = self._suit_orders_ids[order] = len(self._suit_summaries)
+                self._suit_summaries.append(self._suit_summary(order))
+            self._suit_keys[hands_key] = suit_key
+        return suit_key
+
+    def _suit_summary(self, order: tuple[tuple[int, int], ...]) -> tuple:
+        """
+        :param order: The holder and reward of the remaining cards of a suit by descending strength.
+        :returns: The number of cards of each player, the summed rewards of each player's 0, 1, ... highest cards that
+        no other player can beat, and the party (1 for the soloist) and rewards of the run of highest cards held by one
+        party.
+        """
+        lengths = [0, 0, 0]
+        top_points = [[0], [0], [0]]
+        for holder, _ in order:
+            lengths[holder] += 1
+        if order:
+            holder = order[0][0]
+            for card_holder, reward in order:
+                if card_holder != holder:
+                    break
+                top_points[holder].append(top_points[holder][-1] + reward)
+        run_party, run_points = None, 0
+        for holder, reward in order:
+            party = int(holder == self.soloist)
+            if run_party is None:
+                run_party = party
+            elif party != run_party:
+                break
+            run_points += reward
+        return lengths, top_points, run_party, run_points
+
+    def _lead(self, h0: int, h1: int, h2: int, leader: int, first_move: Optional[int],
+              alpha: int, beta: int) -> tuple[int, Optional[int]]:
+        """:returns: The soloist points of this and the following stiche and the best first card of the stich."""
+        self.nodes += 1
+        hand = h0 if leader == 0 else h1 if leader == 1 else h2
+        remaining = h0 | h1 | h2
+        moves = self._moves(hand, remaining)
+        if len(moves) > 1:
+            self._order_leading(moves, hand, remaining)
+        if first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+        maximize = leader == self.soloist
+        best, best_move = (-1 if maximize else 121), None
+        for card_id in moves:
+            bit = 1 << card_id
+            value = self._second(
+                h0 ^ bit if leader == 0 else h0,
+                h1 ^ bit if leader == 1 else h1,
+                h2 ^ bit if leader == 2 else h2,
+                leader, card_id, alpha, beta)
+            if maximize:
+                if value > best:
+                    best, best_move = value, card_id
+                    if best >= beta:
+                        break
+                    alpha = max(alpha, best)
+            elif value < best:
+                best, best_move = value, card_id
+                if best <= alpha:
+                    break
+                beta = min(beta, best)
+        return best, best_move
+
+    def _second(self, h0: int, h1: int, h2: int, leader: int, first: int, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        player = (leader + 1) % 3
+        hand = h0 if player == 0 else h1 if player == 1 else h2
+        leading_suit = self._ingame_suits[first]
+        valid = hand & self._suit_masks[leading_suit] or hand
+        moves = self._moves(valid, h0 | h1 | h2 | 1 << first)
+        if len(moves) > 1:
+            strengths = self._strengths[leading_suit]
+            self._order_following(moves, player, leader, strengths, strengths[first])
+        maximize = player == self.soloist
+        best = -1 if maximize else 121
+        for card_id in moves:
+            bit = 1 << card_id
+            value = self._third(
+                h0 ^ bit if player == 0 else h0,
+                h1 ^ bit if player == 1 else h1,
+                h2 ^ bit if player == 2 else h2,
+                leader, first, card_id, alpha, beta)
+            if maximize:
+                if value > best:
+                    best = value
+                    if best >= beta:
+                        break
+                    alpha = max(alpha, best)
+            elif value < best:
+                best = value
+                if best <= alpha:
+                    break
+                beta = min(beta, best)
+        return best
+
+    def _third(self, h0: int, h1: int, h2: int, leader: int, first: int, second: int, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        player = (leader + 2) % 3
+        hand = h0 if player == 0 else h1 if player == 1 else h2
+        leading_suit = self._ingame_suits[first]
+        valid = hand & self._suit_masks[leading_suit] or hand
+        moves = self._moves(valid, h0 | h1 | h2 | 1 << first | 1 << second)
+        if len(moves) > 1:
+            strengths = self._strengths[leading_suit]
+            if strengths[second] > strengths[first]:
+                self._order_following(moves, player, (leader + 1) % 3, strengths, strengths[second])
+            else:
+                self._order_following(moves, player, leader, strengths, strengths[first])
+        maximize = player == self.soloist
+        soloist = self.soloist
+        stich_winners = self._stich_winners
+        stich_offset = (first * 32 + second) * 32
+        stich_points = _rewards[first] + _rewards[second]
+        keys = self._keys
+        table = self._table
+        # the stiche that end in a known position are looked up first, a bound of one of them may cut off all
+        for card_id in moves:
+            bit = 1 << card_id
+            winner = (leader + stich_winners[stich_offset + card_id]) % 3
+            key = keys.get((h0 ^ bit if player == 0 else h0) | (h1 ^ bit if player == 1 else h1) << 32
+                           | (h2 ^ bit if player == 2 else h2) << 64 | winner << 96)
+            if key is not None:
+                lower, upper, _ = table[key]
+                points = stich_points + _rewards[card_id] if winner == soloist else 0
+                if maximize:
+                    if points + lower >= beta:
+                        return points + lower
+                elif points + upper <= alpha:
+                    return points + upper
+        best = -1 if maximize else 121
+        for card_id in moves:
+            bit = 1 << card_id
+            winner = (leader + stich_winners[stich_offset + card_id]) % 3
+            points = stich_points + _rewards[card_id] if winner == soloist else 0
+            value = points + self._start_stich(
+                h0 ^ bit if player == 0 else h0,
+                h1 ^ bit if player == 1 else h1,
+                h2 ^ bit if player == 2 else h2,
+                winner, alpha - points, beta - points)
+            if maximize:
+                if value > best:
+                    best = value
+                    if best >= beta:
+                        break
+                    alpha = max(alpha, best)
+            elif value < best:
+                best = value
+                if best <= alpha:
+                    break
+                beta = min(beta, best)
+        return best
+
+
+# rewards of all cards in each byte of a card mask
+_byte_points = [
+    [sum(_rewards[offset + bit] for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+    for offset in range(0, 32, 8)
+]
+
+
+def _mask_points(mask: int) -> int:
+    return _byte_points[0][mask & 255] + _byte_points[1][mask >> 8 & 255] + _byte_points[2][mask >> 16 & 255] \
+        + _byte_points[3][mask >> 24]
@@ -1,12 +1,22 @@
 import os
 import random
 import time
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
 
 import players.trump_strategies
 from players import RandomPlayer, Player, get_player
-from skat_game import PlayerParty, SkatGame
+import skat_deals
+from card import Card
+from game_records import GameRecorder, record_filename, read_game_records, replay_game
+from game_results import ResultsWriter, game_result, results_dirname
+from game_summary import GameSummary, summary_filename
+from skat_game import SkatGame, BitboardSkatGame
 from observers import HumanObserver
+from result_cache import ResultCache, matchup_key, merge_cached
+from early_stopping import StoppingRule, add_stopping_arguments, stopping_rule_from_args
 
 # if you want to try playing yourself evaluate: play_skat_for_eval(HumanPlayer(input("What's your name? ")), RandomPlayer("Random 1"), RandomPlayer("Random 2"), random.randint(0, 2))
 
@@ -22,27 +32,132 @@ def play_skat_for_eval(
         soloist: int,
         observe_player: Optional[int] = None,
         random_generator=random.Random(),
-        verbose: Optional[bool] = True) -> list[int]:
-    game = SkatGame(rand_gen=random_generator)
+        verbose: Optional[bool] = True,
+        bitboard=False,
+        recorder: Optional[GameRecorder] = None,
+        run=0,
+        deal: Optional[list[Card]] = None) -> list[int]:
     players = [player1, player2, player3]
+    game = play_game(players, soloist, observe_player, random_generator, bitboard, recorder, run, deal)
+    winning_party = game.winning_party()
+    winners = [player for player_id, player in enumerate(players) if game.player_parties[player_id] == winning_party]
+    if verbose:
+        print(f"{' and '.join(str(winner) for winner in winners)} won with {game.points[winning_party]} points")
+    return game.points
+
+
+def play_game(
+        players: list[Player],
+        soloist: int,
+        observe_player: Optional[int] = None,
+        random_generator=random.Random(),
+        bitboard=False,
+        recorder: Optional[GameRecorder] = None,
+        run=0,
+        deal: Optional[list[Card]] = None,
+        decision_times: Optional[list[float]] = None) -> SkatGame:
+    """
+    Plays a game to its end, see play_skat_for_eval.
+    :param decision_times: Receives the seconds each player spent choosing cards.
+    :returns: The finished game.
+    """
+    game = (BitboardSkatGame if bitboard else SkatGame)(rand_gen=random_generator, deal=deal)
     for player_id, player in enumerate(players):
         for observer in player.observers:
             game.add_observer(observer, player_id)
     if observe_player is not None:
         game.add_observer(HumanObserver(), observe_player)
+    if recorder is not None:
+        recorder.attach(game, run)
     trump, skat = players[soloist].choose_trump_and_skat(game.hands[soloist], game.skat)
     game.set_bid_results(trump, soloist, skat)
 
+    decision_times = [0.0] * 3 if decision_times is None else decision_times
     while not game.done:
-        player = players[game.current_player]
-        card = player.next_card(game.current_hand, game.current_valid_cards)
+        player_id = game.current_player
+        start_time = time.perf_counter()
+        card = players[player_id].next_card(game.current_hand, game.current_valid_cards)
+        decision_times[player_id] += time.perf_counter() - start_time
         game.play_card(card)
+    return game
+
+
+def play_runs(
+        soloist: Player,
+        opponents: list[Player],
+        runs: Iterable[int],
+        deal_seed: int,
+        deals: Optional[np.ndarray] = None,
+        bitboard=False,
+        recorder: Optional[GameRecorder] = None,
+        print_details=False,
+) -> Iterator[tuple]:
+    """:returns: The result of each of the given runs, see game_results.RESULT_DTYPE."""
+    for run in runs:
+        # players are reseeded for each run, so a run is played the same way in any process and order
+        for player in (soloist, *opponents):
+            player.seed_game(run)
+        deal = skat_deals.deal(deal_seed, run) if deals is None else skat_deals.bank_deal(deals, run)
+        decision_times = [0.0] * 3
+        game = play_game([soloist, *opponents], soloist=0,
+                         observe_player=0 if print_details else None,
+                         bitboard=bitboard,
+                         recorder=recorder,
+                         run=run,
+                         deal=deal,
+                         decision_times=decision_times)
+        yield game_result(run, game, decision_times)
+
+
+# players and settings of a worker process of play_runs_parallel
+_worker_state: Optional[tuple] = None
+
+
+def _init_worker(player_specs: list[tuple[type, dict]], deal_seed: int, deals, bitboard: bool, record_games: bool):
+    global _worker_state
+    # memory-mapped deal banks are passed by filename and mapped again instead of being copied
+    if isinstance(deals, str):
+        deals = np.load(deals, mmap_mode="r")
+    _worker_state = ([player_class(**kwargs) for player_class, kwargs in player_specs], deal_seed, deals, bitboard,
+                     record_games)
+
+
+def _play_chunk(runs: list[int]) -> tuple[list[tuple], Optional[np.ndarray]]:
+    players, deal_seed, deals, bitboard, record_games = _worker_state
+    recorder = GameRecorder(None, buffer_size=len(runs)) if record_games else None
+    results = list(play_runs(players[0], players[1:], runs, deal_seed, deals, bitboard, recorder))
+    return results, None if recorder is None else recorder.take()
+
+
+def play_runs_parallel(
+        workers: int,
+        soloist: Player,
+        opponents: list[Player],
+        runs: list[int],
+        deal_seed: int,
+        deals: Optional[np.ndarray] = None,
+        bitboard=False,
+        recorder: Optional[GameRecorder] = None,
+) -> Iterator[tuple]:
+    """
+    Like play_runs, but plays chunks of the runs in worker processes with clones of the players. The results are
+    returned in the order of the runs and are equal to those of play_runs.
+    """
+    player_specs = [(player.__class__, player.kwargs) for player in (soloist, *opponents)]
+    deals = deals.filename if isinstance(deals, np.memmap) else deals
+    chunk_size = max(1, min(100, len(runs) // (workers * 8)))
+    chunks = [runs[i:i + chunk_size] for i in range(0, len(runs), chunk_size)]
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(player_specs, deal_seed, deals, bitboard, recorder is not None)) as pool:
+        try:
+            for results, records in pool.map(_play_chunk, chunks):
+                if recorder is not None:
+                    recorder.write_records(records)
+                yield from results
+        finally:
+            # chunks that have not started when the caller stops early are dropped
+            pool.shutdown(cancel_futures=True)
 
-    winning_party = game.winning_party()
-    winners = [player for player_id, player in enumerate(players) if game.player_parties[player_id] == winning_party]
-    if verbose:
-        print(f"{' and '.join(str(winner) for winner in winners)} won with {game.points[winning_party]} points")
-    return game.points
 
 def log_stats(
         runs,
@@ -57,16 +172,36 @@ def log_stats(
         # Eiter None for no filtering or a list of run IDs
         filter_runs=None,
         print_details=False,
+        # use the bitmask based game engine
+        bitboard=False,
+        # append a binary record of every game to the game record file of the log file (see record_filename)
+        record_games=False,
+        # a deal bank of the seed (see skat_deals.deal_bank) to read the deals from instead of computing them
+        deals=None,
+        # number of processes to play the runs in, the results do not depend on it
+        workers=1,
+        # write all result columns (see game_results.RESULT_DTYPE) to the results directory of the log file
+        save_results=True,
+        # reuse the results of runs that were simulated before with the same players and seed, and store the new ones;
+        # cached runs are neither recorded nor printed
+        cache: Optional[ResultCache] = None,
+        # a work_queue.WorkQueue whose workers play the runs instead of this process, without records and details
+        queue=None,
+        # stop once the result is settled (see early_stopping), runs is the maximum number of runs then
+        stop_rule: Optional[StoppingRule] = None,
 ) -> str:
+    if queue is not None and (record_games or print_details):
+        raise ValueError("games played by the workers of a queue can neither be recorded nor printed")
+
     if soloist is None:
         soloist = RandomPlayer("RANDOM_PLAYER", seed=seed)
 
     if opponents is None:
         opponents = [RandomPlayer("RANDOM_PLAYER", seed=seed), RandomPlayer("RANDOM_PLAYER", seed=seed)]
 
-    random_generator = random.Random(seed)
-    acc_reward = 0
-    solo_wins = 0
+    # game number run is always dealt from (seed, run), independent of the other games
+    deal_seed = skat_deals.resolve_seed(seed)
+    summary = GameSummary()
 
     prefix = 'stats' if log_file_prefix is None else log_file_prefix
     if directory is not None:
@@ -75,37 +210,55 @@ def log_stats(
     else:
         file_name = f"logs/{game_filename(prefix, soloist, opponents, timestamp)}"
 
+    writer = ResultsWriter(file_name if create_log_file else None,
+                           results_dirname(file_name) if save_results and create_log_file else None)
+    recorder = GameRecorder(record_filename(file_name)) if record_games else None
+
+    # filtered runs are dealt directly, without playing or dealing the runs before them
+    played_runs = list(range(runs)) if filter_runs is None else sorted(run for run in set(filter_runs) if run < runs)
+    simulated_runs = played_runs
+    if cache is not None:
+        matchup = matchup_key(soloist, opponents, deal_seed)
+        cached = cache.load(matchup, played_runs)
+        simulated_runs = [run for run in played_runs if run not in cached]
+        if cached:
+            print(f"Reusing {len(cached)} cached runs, simulating {len(simulated_runs)} runs")
+    if queue is not None:
+        results = queue.play_runs(soloist, opponents, simulated_runs, deal_seed, bitboard)
+    elif workers > 1 and not print_details:
+        results = play_runs_parallel(workers, soloist, opponents, simulated_runs, deal_seed, deals, bitboard, recorder)
+    else:
+        results = play_runs(soloist, opponents, simulated_runs, deal_seed, deals, bitboard, recorder, print_details)
+    if cache is not None:
+        results = merge_cached(played_runs, cached, results, cache, matchup)
+    for result in results:
+        run, total_reward = result[0], result[1]
+        writer.add(result)
+        summary.add(total_reward)
+        if log_interval > 0 and run % log_interval == 0 and filter_runs is None:
+            print(
+                f"Finished run: {run}, Average Reward: {summary.total / (run + 1)}, Solo Win Chance: {summary.wins * 100 / (run + 1)}%,"
+                f"Simulation Completed: {(run + 1) * 100 / runs}%")
+        if stop_rule is not None and stop_rule.should_stop(summary):
+            print(f"Stopped after {summary.count} runs: {stop_rule.describe(summary)}")
+            break
+    results.close()
+
+    writer.close()
+    if recorder is not None:
+        recorder.close()
     if create_log_file:
-        with open(file_name, "a") as stats_file:
-            stats_file.write(f"run\ttotal_reward\n")
-
-    for run in range(runs):
-        if filter_runs is None or run in filter_runs:
-            total_reward = play_skat_for_eval(soloist, opponents[0], opponents[1], soloist=0,
-                                              observe_player=0 if print_details else None,
-                                              random_generator=random_generator,
-                                              verbose=False)[PlayerParty.soloist]
-            if create_log_file:
-                with open(file_name, "a") as stats_file:
-                    stats_file.write(f"{run}\t{total_reward}\n")
-            acc_reward += total_reward
-            if total_reward > 60:
-                solo_wins += 1
-            if log_interval > 0 and run % log_interval == 0 and filter_runs is None:
-                print(
-                    f"Finished run: {run}, Average Reward: {acc_reward / (run + 1)}, Solo Win Chance: {solo_wins * 100 / (run + 1)}%,"
-                    f"Simulation Completed: {(run + 1) * 100 / runs}%")
-        else:
-            SkatGame(rand_gen=random_generator)
+        summary.save(summary_filename(file_name))
 
     if filter_runs is None:
-        print(f"\nRuns: {runs}, Average Reward: {acc_reward / runs}, Solo Win Chance: {solo_wins * 100 / runs}%")
+        print(f"\nRuns: {summary.count}, Average Reward: {summary.mean}, Solo Win Chance: {summary.win_rate * 100}%")
 
     return file_name
 
 
 def main():
     from argparse import ArgumentParser
+    from work_queue import WorkQueue
 
     parser = ArgumentParser(description="Simulate skat game with the specified players",
                             prog="python -m skat_statistics")
@@ -121,8 +274,21 @@ def main():
                         help="the seed for the played games and the players (default: 1337)")
     parser.add_argument("--replay-score", type=int, default=-1,
                         help="If set, game details for all games above or equal to the score are printed.")
+    parser.add_argument("--bitboard", action='store_true',
+                        help="set flag to simulate with the bitmask based game engine")
+    parser.add_argument("--record", action='store_true',
+                        help="set flag to store a binary record of every game next to the log file")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="how many processes to simulate the games in, does not change the results (default: 1)")
+    add_stopping_arguments(parser)
+    parser.add_argument("--queue", type=str, default=None,
+                        help="shared work queue directory, the games are simulated by the workers started with "
+                             "'python -m work_queue <directory>' instead")
 
     args = parser.parse_args()
+    if args.queue is not None and (args.record or args.replay_score >= 0):
+        parser.error("--record and --replay-score need the games played in this process and cannot be used with "
+                     "--queue")
 
     trump_strategy = getattr(players.trump_strategies, args.trump_strategy)()
     soloist = get_player(args.soloist, seed=args.seed, trump_strategy=trump_strategy)
@@ -136,32 +302,25 @@ def main():
         soloist,
         [defender, defender.clone()],
         args.seed,
-        create_log_file=True)
+        create_log_file=True,
+        bitboard=args.bitboard,
+        # replays are played from the game records instead of simulating the games again
+        record_games=args.record or args.replay_score >= 0,
+        workers=args.workers,
+        queue=None if args.queue is None else WorkQueue(args.queue),
+        stop_rule=stopping_rule_from_args(args))
 
     if args.replay_score >= 0:
         print(f"\n--------- REPLAY RUNS WITH SCORE {args.replay_score} OR HIGHER ---------")
         print(f"Replaying games for\n\tsoloist: {soloist}\n\tdefender: {defender}")
 
-        filtered = []
-        with open(results, "r") as stats_file:
-            for line in stats_file.readlines()[1:]:
-                run_str, reward_str = line.split('\t')
-                reward = int(reward_str)
-                if reward >= args.replay_score:
-                    filtered.append(int(run_str))
+        records = read_game_records(record_filename(results))
+        filtered = records[records["soloist_points"] >= args.replay_score]
 
         print(f"Replaying {len(filtered)} games...")
         print("")
-        log_stats(
-            args.game_count,
-            args.game_count / 10,
-            soloist,
-            [defender, defender.clone()],
-            args.seed,
-            create_log_file=False,
-            filter_runs=filtered,
-            print_details=True,
-        )
+        for record in filtered:
+            replay_game(record, [(HumanObserver(), 0)], BitboardSkatGame if args.bitboard else SkatGame)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,17 @@
+import hashlib
 import os
 import time
+from typing import Optional
 
 import players.trump_strategies
+from duplicate_evaluation import print_paired_comparison
+from early_stopping import StoppingRule, add_stopping_arguments, stopping_rule_from_args
 from players import Player, get_player
+from result_cache import ResultCache, matchup_key
+from skat_deals import deal_bank
 from skat_statistics import log_stats, game_filename
+from statistics.tournament_scheduler import schedule_tournament
+from work_queue import WorkQueue
 from statistics.visualization.tournament_heatmap_visualization import print_tournament_heatmap, tournament_heatmap
 
 
@@ -25,21 +33,56 @@ def tournament(
         seed: int,
         tournament_name=None,
         reuse_dirs: list[str] = None,
+        workers=1,
+        # SQLite database of simulated games (see ResultCache), so that only games missing from it are simulated
+        cache_file: Optional[str] = None,
+        # shared work queue directory (see WorkQueue), whose workers simulate the games instead of this process
+        queue_dir: Optional[str] = None,
+        # stop simulating a cell once its result is settled (see early_stopping), num_games is the maximum then
+        stop_rule: Optional[StoppingRule] = None,
 ) -> list[list[str]]:
     results = []
+    cache = None if cache_file is None else ResultCache(cache_file)
     timestamp = time.strftime("%Y%m%d-%H%M%S")
+    tournament_suffix = "" if tournament_name is None else f"-{tournament_name}"
+    # the deals are generated once and shared by all cells, so every cell plays the same games
+    deals = deal_bank(seed, num_games)
+    reused = {
+        (soloist, defender): find_existing_stats(reuse_dirs, soloist, [defender, defender]) if reuse_dirs else None
+        for soloist in solo_players for defender in team_players
+    }
+    queue = None if queue_dir is None else WorkQueue(queue_dir)
+    if queue is not None:
+        # the games of all cells are queued first, so the workers are never idle between cells
+        for (soloist, defender), log_filename in reused.items():
+            if log_filename is None:
+                # the workers create the players from class and kwargs, so the team needs no clone of the defender
+                team = [defender, defender]
+                cached = {} if cache is None else cache.load(matchup_key(soloist, team, seed), range(num_games))
+                queue.submit(soloist, team, seed, [run for run in range(num_games) if run not in cached])
+    elif workers > 1:
+        # all cells are simulated on one worker pool first, the loop below then only writes their logs from the cache
+        cells = [cell for cell, log_filename in reused.items() if log_filename is None]
+        if cache is None:
+            # named after the players and seed of the cells, so a restarted tournament finds its checkpoint again
+            digest = hashlib.sha256(
+                "".join(sorted(matchup_key(soloist, [defender, defender], seed) for soloist, defender in cells)).encode()
+            ).hexdigest()
+            cache = ResultCache(f"logs/checkpoints/tournament{tournament_suffix}-{digest[:16]}.sqlite")
+        schedule_tournament(cells, num_games, seed, deals, cache, workers, stop_rule=stop_rule)
     for soloist in solo_players:
         row = []
         for defender in team_players:
-            team = [defender, defender.clone()]
-            log_filename = find_existing_stats(reuse_dirs, soloist, team) if reuse_dirs else None
+            # the games are only played in this process without queue and worker pool, otherwise the results come
+            # from the cache and the team only names the cell
+            team = [defender, defender.clone()] if queue is None and workers == 1 else [defender, defender]
+            log_filename = reused[soloist, defender]
 
             if log_filename:
                 print(f"Reusing results for soloist {soloist} vs. team of {defender} from old tournament")
                 row.append(log_filename)
             else:
                 print(f"Simulating soloist {soloist} vs. team of {defender}")
-                tournament_suffix = "" if tournament_name is None else f"-{tournament_name}"
                 row.append(log_stats(
                     num_games,
                     log_interval=num_games / 10,
@@ -49,9 +92,15 @@ def tournament(
                     create_log_file=True,
                     log_file_prefix="tournament",
                     directory=f"{timestamp}{tournament_suffix}",
-                    timestamp=False
+                    timestamp=False,
+                    deals=deals,
+                    cache=cache,
+                    queue=queue,
+                    stop_rule=stop_rule,
                 ))
         results.append(row)
+    if cache is not None:
+        cache.close()
     return results
 
 
@@ -89,7 +138,19 @@ if __name__ == "__main__":
                         help="the seed for the played games and the players (default: 1337)")
     parser.add_argument("--reuse-logs", nargs='+', type=str,
                         help="paths to log dirs from existing tournaments to reduce simulation time")
+    parser.add_argument("--result-cache", type=str, default=None,
+                        help="database of simulated games, e.g. logs/results.sqlite, only games missing from it are "
+                             "simulated (default: none, all games are simulated)")
     parser.add_argument("--visualize", action='store_true', help="set flag to plot heatmaps for winrates and rewards")
+    parser.add_argument("--paired", action='store_true',
+                        help="set flag to compare the soloists deal by deal against each defender")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="how many processes to simulate the games of all rounds in, finished games are kept in "
+                             "the result cache so an interrupted tournament resumes where it stopped (default: 1)")
+    parser.add_argument("--queue", type=str, default=None,
+                        help="shared work queue directory, the games are simulated by the workers started with "
+                             "'python -m work_queue <directory>' on any host that mounts it")
+    add_stopping_arguments(parser)
     parser.add_argument("--device", "-d", choices=["auto", "cpu", "cuda"], default="auto",
                         help="Device on which to run the model players (default: auto)")
 
@@ -107,8 +168,15 @@ if __name__ == "__main__":
         for (name, defender) in zip(args.defender_names, defenders):
             defender.name = name
 
-    logs = tournament(soloists, defenders, args.game_count, args.seed, args.name, args.reuse_logs)
+    logs = tournament(soloists, defenders, args.game_count, args.seed, args.name, args.reuse_logs, args.workers,
+                      args.result_cache, args.queue,
+                      stopping_rule_from_args(args))
     print_tournament_heatmap([str(p) for p in soloists], [str(p) for p in defenders], logs)
+    if args.paired:
+        # all cells play the same deals, so the soloists are compared deal by deal against each defender
+        for column, defender in enumerate(defenders):
+            print(f"\nPaired comparison against {defender}:")
+            print_paired_comparison([str(p) for p in soloists], [[row[column]] for row in logs])
 
     if args.visualize:
         tournament_heatmap([str(p) for p in soloists], [str(p) for p in defenders], logs, args.name)
@@ -0,0 +1,109 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+import numpy as np
+
+from early_stopping import StoppingRule
+from game_summary import GameSummary
+from players import Player
+from result_cache import ResultCache, matchup_key
+from skat_statistics import play_runs
+
+# player specs and seed of a worker process, and the players it has created so far
+_worker_state: Optional[tuple] = None
+_worker_players: dict[tuple[int, int], Player] = {}
+
+
+def _init_worker(player_specs: list[tuple[type, dict]], seed: int, deals_filename: str):
+    global _worker_state
+    _worker_state = (player_specs, seed, np.load(deals_filename, mmap_mode="r"))
+    _worker_players.clear()
+
+
+def _worker_player(spec_index: int, position: int) -> Player:
+    # players are created on first use, so a worker only loads the models of the cells it plays
+    key = (spec_index, position)
+    if key not in _worker_players:
+        player_class, kwargs = _worker_state[0][spec_index]
+        _worker_players[key] = player_class(**kwargs)
+    return _worker_players[key]
+
+
+def _play_chunk(chunk: tuple[int, int, int, list[int]]) -> tuple[int, list[tuple]]:
+    cell, soloist_index, defender_index, runs = chunk
+    _, seed, deals = _worker_state
+    soloist = _worker_player(soloist_index, 0)
+    team = [_worker_player(defender_index, 1), _worker_player(defender_index, 2)]
+    return cell, list(play_runs(soloist, team, runs, seed, deals))
+
+
+def schedule_tournament(
+        cells: list[tuple[Player, Player]],
+        num_games: int,
+        seed: int,
+        deals: np.memmap,
+        cache: ResultCache,
+        workers: int,
+        chunk_size=100,
+        stop_rule: Optional[StoppingRule] = None,
+):
+    """
+    Simulates the games of all tournament cells (soloist, defender) that are missing from the cache on one pool of
+    worker processes. The cells are split into chunks of chunk_size games that idle workers take from a shared queue,
+    so a slow cell never keeps the other workers waiting. Every finished chunk is stored in the cache right away, so an
+    interrupted tournament resumes with the missing chunks only.
+    :param deals: The memory-mapped deal bank of the seed with at least num_games deals.
+    :param stop_rule: The chunks of a cell are cancelled once the rule stops on its results in run order.
+    """
+    # players that appear in several cells are sent to the workers once
+    spec_indices: dict[int, int] = {}
+    player_specs = []
+    for player in {id(player): player for cell in cells for player in cell}.values():
+        spec_indices[id(player)] = len(player_specs)
+        player_specs.append((player.__class__, player.kwargs))
+
+    chunks = []
+    matchups = []
+    # total rewards of each cell that are not yet in its summary, by run
+    rewards: list[dict[int, int]] = []
+    for cell, (soloist, defender) in enumerate(cells):
+        # a clone has the class and kwargs of the defender, so the defender itself gives the key of the team
+        matchups.append(matchup_key(soloist, [defender, defender], seed))
+        cached = cache.load(matchups[cell], range(num_games))
+        rewards.append({run: result[1] for run, result in cached.items()})
+        missing = [run for run in range(num_games) if run not in cached]
+        chunks += [(cell, spec_indices[id(soloist)], spec_indices[id(defender)], missing[i:i + chunk_size])
+                   for i in range(0, len(missing), chunk_size)]
+
+    summaries = [GameSummary() for _ in cells]
+    stopped = [False] * len(cells)
+    cell_futures = [[] for _ in cells]
+
+    def advance(cell: int):
+        # the rule sees the results in run order, like log_stats, so both stop after the same run
+        summary = summaries[cell]
+        while stop_rule is not None and not stopped[cell] and summary.count in rewards[cell]:
+            summary.add(rewards[cell].pop(summary.count))
+            if stop_rule.should_stop(summary):
+                stopped[cell] = True
+                for future in cell_futures[cell]:
+                    future.cancel()
+
+    print(f"Simulating {len(chunks)} chunks of up to {chunk_size} games on {workers} workers")
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(player_specs, seed, deals.filename)) as pool:
+        futures = []
+        for chunk in chunks:
+            futures.append(pool.submit(_play_chunk, chunk))
+            cell_futures[chunk[0]].append(futures[-1])
+        for cell in range(len(cells)):
+            advance(cell)
+        for finished, future in enumerate(as_completed(futures), start=1):
+            if future.cancelled():
+                continue
+            cell, results = future.result()
+            cache.store(matchups[cell], results)
+            rewards[cell].update((result[0], result[1]) for result in results)
+            advance(cell)
+            if finished % max(1, len(chunks) // 10) == 0:
+                print(f"Finished chunks: {finished}/{len(chunks)}")
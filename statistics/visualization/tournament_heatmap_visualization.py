@@ -1,10 +1,11 @@
 import os
-from pathlib import Path
 
 import pandas as pd
 import seaborn as sns
 from matplotlib import pyplot as plt
 
+from game_summary import load_summary
+
 
 def tournament_heatmap(
     soloist_names: list[str],
@@ -21,18 +22,9 @@ def tournament_heatmap(
         row_rewards = []
         row_winrates = []
         for cell in row:
-            with open(Path(cell), "r") as file:
-                lines = file.readlines()[1:]
-                total = 0
-                won = 0
-                for line in lines:
-                    _, reward_str = line.split('\t')
-                    reward = int(reward_str)
-                    if reward > 60:
-                        won += 1
-                    total += reward
-            row_rewards.append(total / len(lines))
-            row_winrates.append(won * 100 / len(lines))
+            summary = load_summary(cell)
+            row_rewards.append(summary.mean)
+            row_winrates.append(summary.win_rate * 100)
         results_reward.append(row_rewards)
         results_winrate.append(row_winrates)
 
@@ -89,15 +81,6 @@ def print_tournament_heatmap(
         print("{:25s} | ".format(soloist_names[index]), end="")
         row = tournament_logs[index]
         for cell in row:
-            with open(Path(cell), "r") as file:
-                lines = file.readlines()[1:]
-                total = 0
-                won = 0
-                for line in lines:
-                    _, reward_str = line.split('\t')
-                    reward = int(reward_str)
-                    if reward > 60:
-                        won += 1
-                    total += reward
-                print("{:3.2f} : {:3.2f}% | ".format(total / len(lines), won * 100 / len(lines)), end="")
+            summary = load_summary(cell)
+            print("{:3.2f} : {:3.2f}% | ".format(summary.mean, summary.win_rate * 100), end="")
         print("")
@@ -2,6 +2,7 @@ from typing import Optional
 
 from sb3_contrib import MaskablePPO
 
+from training.custom_network import EmbeddingPolicy
 from training_config import TrainingConfig
 from observers import MarkovObserverV1, DrunkenRainerObserverV1, DrunkenRainerObserverV2, CountingObserver
 from players.trump_strategies import SuitAmountTrumpStrategy, SuitAmountTrumpStrategyBetterSkat
@@ -14,7 +15,26 @@ configs = {
         MarkovObserverV1,
         dict(positional_trump=False, win_reward=False),
         SuitAmountTrumpStrategy
-    )
+    ),
+    # the same observations as flat vector for MlpPolicy, without dict preprocessing in each step
+    "markov_suit_amount_small_flat": TrainingConfig(
+        MaskablePPO,
+        "MlpPolicy",
+        {},
+        MarkovObserverV1,
+        dict(positional_trump=False, win_reward=False),
+        SuitAmountTrumpStrategy,
+        flat_observation=True,
+    ),
+    # embeds the card codes of the observations instead of one-hot encoding them, with CustomNetwork on top
+    "markov_embedding": TrainingConfig(
+        MaskablePPO,
+        EmbeddingPolicy,
+        dict(features_extractor_kwargs=dict(embedding_dim=8)),
+        MarkovObserverV1,
+        dict(positional_trump=False, win_reward=False),
+        SuitAmountTrumpStrategy
+    ),
 }
 
 
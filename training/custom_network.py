@@ -1,6 +1,9 @@
 from typing import Tuple
 
+import gym
 import torch as th
+from sb3_contrib.common.maskable.policies import MaskableMultiInputActorCriticPolicy
+from stable_baselines3.common.torch_layers import BaseFeaturesExtractor
 from torch import nn
 
 
@@ -53,3 +56,60 @@ class CustomNetwork(nn.Module):
 
     def forward_critic(self, features: th.Tensor) -> th.Tensor:
         return self.value_net(features)
+
+
+class EmbeddingExtractor(BaseFeaturesExtractor):
+    """
+    Features extractor for dict observations that looks up learned embeddings of the integer codes of Discrete and
+    MultiDiscrete keys instead of one-hot encoding them, e.g. 30 * embedding_dim features for the stich list of the
+    Markov observers instead of 30 * 97. MultiBinary and Box keys are passed on as they are. The observations must not
+    be preprocessed, see EmbeddingPolicy.
+
+    :param embedding_dim: size of the embedding of a code, at most the number of codes of the key
+    """
+
+    def __init__(self, observation_space: gym.spaces.Dict, embedding_dim: int = 8):
+        # number of codes and embedding size of each embedded key
+        embedded = {}
+        features_dim = 0
+        for key, subspace in observation_space.spaces.items():
+            if isinstance(subspace, gym.spaces.Discrete):
+                embedded[key] = (int(subspace.n), min(embedding_dim, int(subspace.n)))
+                features_dim += embedded[key][1]
+            elif isinstance(subspace, gym.spaces.MultiDiscrete):
+                embedded[key] = (int(subspace.nvec.max()), min(embedding_dim, int(subspace.nvec.max())))
+                features_dim += len(subspace.nvec) * embedded[key][1]
+            else:
+                features_dim += gym.spaces.flatdim(subspace)
+        super(EmbeddingExtractor, self).__init__(observation_space, features_dim)
+
+        self.keys = list(observation_space.spaces)
+        self.embeddings = nn.ModuleDict({key: nn.Embedding(codes, size) for key, (codes, size) in embedded.items()})
+
+    def forward(self, observations: dict[str, th.Tensor]) -> th.Tensor:
+        features = []
+        for key in self.keys:
+            observation = observations[key].reshape(len(observations[key]), -1)
+            if key in self.embeddings:
+                features.append(self.embeddings[key](observation.long()).flatten(1))
+            else:
+                features.append(observation.float())
+        return th.cat(features, dim=1)
+
+
+class EmbeddingPolicy(MaskableMultiInputActorCriticPolicy):
+    """
+    Maskable policy for dict observations that passes the raw observations to an EmbeddingExtractor and uses
+    CustomNetwork for the policy and value networks.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("features_extractor_class", EmbeddingExtractor)
+        super(EmbeddingPolicy, self).__init__(*args, **kwargs)
+
+    def _build_mlp_extractor(self) -> None:
+        self.mlp_extractor = CustomNetwork(self.features_dim)
+
+    def extract_features(self, obs: dict[str, th.Tensor]) -> th.Tensor:
+        # the embeddings look up the integer codes, so they are not one-hot encoded first
+        return self.features_extractor(obs)
@@ -23,6 +23,8 @@ def self_train(
     batch_size=64,
     device: str = "auto",
     verbose=1,
+    num_envs=1,
+    seed=None,
 ):
     training_dir = f"{model_dir}/{config}/self_train_{bootstrap_player}_{steps_per_generation}"
     for pos in PlayerPosition:
@@ -43,7 +45,7 @@ def self_train(
             config, current_position, before_player, after_player,
             num_timesteps=steps_per_generation, save_interval=steps_per_generation,
             batch_size=batch_size, device=device, verbose=verbose,
-            training_dir=agent_dir
+            training_dir=agent_dir, num_envs=num_envs, seed=seed
         )
 
         trained_steps[current_position] += steps_per_generation
@@ -74,6 +76,8 @@ def main():
         batch_size=args.batch_size,
         device=args.device,
         verbose=args.verbosity,
+        num_envs=args.num_envs,
+        seed=args.seed,
     )
 
 
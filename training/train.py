@@ -1,14 +1,17 @@
 import os
 import time
+from functools import partial
 from typing import Optional
 
 from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import VecMonitor
 
 import players
 from players import Player
 from skat_env import SkatEnv, PlayerPosition
 from training import configs
 from training.utility import find_latest_model
+from training.vec_env import SharedMemoryVecEnv, make_skat_env
 from training_config import TrainingConfig
 from training.training_callbacks import SaveOnBestTrainingRewardCallback
 
@@ -26,18 +29,32 @@ def train_config(
     device: str = "auto",
     verbose=1,
     training_dir: Optional[str] = None,
+    num_envs=1,
+    seed: Optional[int] = None,
 ):
     training_dir = training_dir or f"{model_dir}/{config}/{player_position.name}_{predecessor}_{successor}"
     os.makedirs(training_dir, exist_ok=True)
 
-    skat_env = SkatEnv(
-        player_position, predecessor, successor, config.observer(**config.observer_kwargs), config.trump_strategy())
-    env = Monitor(skat_env, f"{training_dir}/{time.strftime('%Y%m%d-%H%M%S')}")
+    monitor_filename = f"{training_dir}/{time.strftime('%Y%m%d-%H%M%S')}"
+    if num_envs > 1:
+        # every worker process creates its own players from their class and kwargs
+        player_specs = [(player.__class__, player.kwargs) for player in (predecessor, successor)]
+        vec_env = SharedMemoryVecEnv(
+            [partial(make_skat_env, config, player_position, *player_specs, seed, index) for index in range(num_envs)])
+        # the episodes of all workers go to one monitor file, which the callback reads
+        env = VecMonitor(vec_env, monitor_filename)
+    else:
+        skat_env = SkatEnv(
+            player_position, predecessor, successor, config.observer(**config.observer_kwargs), config.trump_strategy(),
+            flat_observation=config.flat_observation)
+        env = Monitor(skat_env, monitor_filename)
 
     callback = SaveOnBestTrainingRewardCallback(
-        check_freq=10000,
+        # every step of the callback covers one step of each environment, the episode window stays the same
+        check_freq=max(1, 10000 // num_envs),
         log_dir=training_dir,
-        save_interval=save_interval)
+        save_interval=save_interval,
+        episode_window=1000)
 
     latest_model, _ = find_latest_model(training_dir)
     if latest_model:
@@ -45,12 +62,15 @@ def train_config(
         model = config.algorithm.load(
             latest_model, env, policy_kwargs=config.policy_kwargs,
             batch_size=batch_size, device=device)
+        if seed is not None:
+            model.set_random_seed(seed)
     else:
         model = config.algorithm(
             config.policy, env, policy_kwargs=config.policy_kwargs, verbose=verbose,
-            batch_size=batch_size, device=device)
+            batch_size=batch_size, device=device, seed=seed)
 
     model.learn(total_timesteps=num_timesteps, callback=callback, log_interval=None, reset_num_timesteps=False)
+    env.close()
 
 
 def add_training_parameters(parser):
@@ -60,6 +80,10 @@ def add_training_parameters(parser):
                         help="Number of steps after which training stops automatically (default: 10_000_000).")
     parser.add_argument("--device", "-d", choices=["auto", "cpu", "cuda"], default="auto",
                         help="Device on which to run the training (default: auto)")
+    parser.add_argument("--num-envs", type=int, default=1,
+                        help="Number of environments that collect experience in parallel processes (default: 1).")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for the deals and players of the environments (default: random).")
     parser.add_argument("--verbosity", "-v", choices=[0, 1, 2], default=1,
                         help="The verbosity level (default: 1).")
 
@@ -96,6 +120,8 @@ def main():
         batch_size=args.batch_size,
         device=args.device,
         verbose=args.verbosity,
+        num_envs=args.num_envs,
+        seed=args.seed,
     )
 
 
@@ -13,12 +13,14 @@ class SaveOnBestTrainingRewardCallback(BaseCallback):
     :param log_dir: (str) Path to the folder where the model will be saved.
       It must contain the file created by the ``Monitor`` wrapper.
     :param save_interval: (int) when should a model get saved
+    :param episode_window: (int) the number of last episodes the mean reward and won games are computed over
     :param verbose: (int)
     """
 
-    def __init__(self, check_freq: int, log_dir: str, save_interval: int, verbose=1):
+    def __init__(self, check_freq: int, log_dir: str, save_interval: int, episode_window=1000, verbose=1):
         super(SaveOnBestTrainingRewardCallback, self).__init__(verbose)
         self.check_freq = check_freq
+        self.episode_window = episode_window
         self.save_interval = save_interval
         self.log_dir = log_dir
         self.best_model_path = f"{log_dir}/best_model.zip"
@@ -31,7 +33,7 @@ class SaveOnBestTrainingRewardCallback(BaseCallback):
             x, y = ts2xy(load_results(self.log_dir), 'timesteps')
             if len(x) > 0:
                 # Mean training reward over the last episodes
-                rewards: np.ndarray = y[-self.check_freq // 10:]
+                rewards: np.ndarray = y[-self.episode_window:]
                 mean_reward = np.mean(rewards)
                 games_won = np.count_nonzero(rewards > 60) / rewards.size * 100
                 self.best_mean_reward = max(self.best_mean_reward, mean_reward)
@@ -40,7 +42,9 @@ class SaveOnBestTrainingRewardCallback(BaseCallback):
                     print(f"Best mean reward: {self.best_mean_reward:.2f} - "
                           f"Last mean reward per episode: {mean_reward:.2f} - Percentage of won games: {games_won:.2f}")
 
-        if self.num_timesteps % self.save_interval == 0:
+        # with several environments, num_timesteps grows by their number in each step and may skip the multiples
+        previous_timesteps = self.num_timesteps - self.training_env.num_envs
+        if self.num_timesteps // self.save_interval > previous_timesteps // self.save_interval:
             regular_save_path = f"{self.log_dir}/{self.num_timesteps:_}"
             if self.verbose > 0:
                 print(f"Saving model to {regular_save_path}")
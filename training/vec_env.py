@@ -0,0 +1,239 @@
+import multiprocessing as mp
+from collections import OrderedDict
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Optional, Sequence
+
+import gym
+import numpy as np
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv, VecEnvIndices
+
+from players import Player
+from skat_deals import game_seed
+from skat_env import SkatEnv, PlayerPosition
+from training_config import TrainingConfig
+
+
+def _attach(buffer_specs: dict[str, tuple[str, tuple, str]]) -> tuple[list[SharedMemory], dict[str, np.ndarray]]:
+    memories = []
+    arrays = {}
+    for key, (name, shape, dtype) in buffer_specs.items():
+        memory = SharedMemory(name)
+        memories.append(memory)
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+    return memories, arrays
+
+
+def _write(arrays: dict[str, np.ndarray], index: int, env: gym.Env, observation):
+    if isinstance(observation, dict):
+        for key, value in observation.items():
+            arrays[f"observation/{key}"][index] = value
+    elif observation is not getattr(env, "observation_buffer", None):
+        arrays["observation"][index] = observation
+    if "action_masks" in arrays:
+        arrays["action_masks"][index] = env.action_masks()
+
+
+def _worker(remote, parent_remote, env_fn_wrapper: CloudpickleWrapper, index: int):
+    parent_remote.close()
+    env = env_fn_wrapper.var()
+    memories: list[SharedMemory] = []
+    arrays: dict[str, np.ndarray] = {}
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == "step":
+                observation, reward, done, info = env.step(int(arrays["actions"][index]))
+                if done:
+                    # the final observation is not needed, as games always end by playing the last card
+                    observation = env.reset()
+                _write(arrays, index, env, observation)
+                arrays["rewards"][index] = reward
+                arrays["dones"][index] = done
+                remote.send(info)
+            elif command == "reset":
+                _write(arrays, index, env, env.reset(seed=data))
+                remote.send(None)
+            elif command == "get_spaces":
+                remote.send((env.observation_space, env.action_space, hasattr(env, "action_masks")))
+            elif command == "attach":
+                memories, arrays = _attach(data)
+                if getattr(env, "observation_buffer", None) is not None:
+                    # flat observations are written straight into the shared memory
+                    env.observation_buffer = arrays["observation"][index]
+                remote.send(None)
+            elif command == "env_method":
+                remote.send(getattr(env, data[0])(*data[1], **data[2]))
+            elif command == "get_attr":
+                remote.send(getattr(env, data))
+            elif command == "set_attr":
+                remote.send(setattr(env, data[0], data[1]))
+            elif command == "close":
+                env.close()
+                break
+            else:
+                raise NotImplementedError(f"`{command}` is not implemented in the worker")
+    except EOFError:
+        pass
+    finally:
+        # the views into the shared memory have to be released before it is closed
+        if getattr(env, "observation_buffer", None) is not None:
+            env.observation_buffer = None
+        arrays.clear()
+        for memory in memories:
+            memory.close()
+        remote.close()
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """
+    Runs each environment in its own process, like SubprocVecEnv. Observations, action masks, rewards, dones and
+    actions are exchanged through shared memory arrays, only commands and info dicts are sent through the pipes.
+    Episodes of environments that are done are reset in the worker, without a terminal observation in the info.
+    :param seeds: The seed of the first reset of each environment.
+    """
+
+    def __init__(self, env_fns: list[Callable[[], gym.Env]], seeds: Optional[Sequence[int]] = None,
+                 start_method: Optional[str] = None):
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        context = mp.get_context(start_method)
+        self.remotes, work_remotes = zip(*[context.Pipe() for _ in env_fns])
+        self.processes = []
+        for index, (work_remote, remote, env_fn) in enumerate(zip(work_remotes, self.remotes, env_fns)):
+            process = context.Process(target=_worker, args=(work_remote, remote, CloudpickleWrapper(env_fn), index),
+                                      daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        self.remotes[0].send(("get_spaces", None))
+        observation_space, action_space, has_action_masks = self.remotes[0].recv()
+        super().__init__(len(env_fns), observation_space, action_space)
+
+        shapes = {}
+        if isinstance(observation_space, gym.spaces.Dict):
+            self._observation_keys = list(observation_space.spaces)
+            for key, space in observation_space.spaces.items():
+                shapes[f"observation/{key}"] = (space.shape, space.dtype)
+        else:
+            self._observation_keys = None
+            shapes["observation"] = (observation_space.shape, observation_space.dtype)
+        if has_action_masks:
+            shapes["action_masks"] = ((action_space.n,), np.dtype(bool))
+        shapes["rewards"] = ((), np.dtype(np.float32))
+        shapes["dones"] = ((), np.dtype(bool))
+        shapes["actions"] = ((), np.dtype(np.int64))
+
+        self._memories: list[SharedMemory] = []
+        self._arrays: dict[str, np.ndarray] = {}
+        buffer_specs = {}
+        for key, (shape, dtype) in shapes.items():
+            shape = (self.num_envs, *shape)
+            memory = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+            self._memories.append(memory)
+            self._arrays[key] = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+            buffer_specs[key] = (memory.name, shape, dtype.str)
+        for remote in self.remotes:
+            remote.send(("attach", buffer_specs))
+        for remote in self.remotes:
+            remote.recv()
+
+        self._seeds = [None] * self.num_envs if seeds is None else list(seeds)
+        self.closed = False
+
+    def _observations(self):
+        # copies, as the buffers are overwritten by the next step while SB3 still uses the last observations
+        if self._observation_keys is None:
+            return self._arrays["observation"].copy()
+        return OrderedDict((key, self._arrays[f"observation/{key}"].copy()) for key in self._observation_keys)
+
+    def reset(self):
+        for remote, seed in zip(self.remotes, self._seeds):
+            remote.send(("reset", seed))
+        for remote in self.remotes:
+            remote.recv()
+        self._seeds = [None] * self.num_envs
+        return self._observations()
+
+    def step_async(self, actions: np.ndarray):
+        self._arrays["actions"][:] = actions
+        for remote in self.remotes:
+            remote.send(("step", None))
+
+    def step_wait(self):
+        infos = [remote.recv() for remote in self.remotes]
+        return self._observations(), self._arrays["rewards"].copy(), self._arrays["dones"].copy(), infos
+
+    def action_masks(self) -> np.ndarray:
+        """:returns: The action masks of the current observations of all environments."""
+        return self._arrays["action_masks"].copy()
+
+    def seed(self, seed: Optional[int] = None) -> list[Optional[int]]:
+        """Sets independent seeds for the next reset of each environment, derived from the seed."""
+        if seed is not None:
+            self._seeds = [game_seed(seed, index) for index in range(self.num_envs)]
+        return self._seeds
+
+    def close(self):
+        if self.closed:
+            return
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self._arrays.clear()
+        for memory in self._memories:
+            memory.close()
+            memory.unlink()
+        self.closed = True
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> list[Any]:
+        if attr_name == "action_masks" and "action_masks" in self._arrays:
+            # bound methods of the environments cannot be sent through the pipes
+            return [self.action_masks for _ in self._get_indices(indices)]
+        remotes = [self.remotes[i] for i in self._get_indices(indices)]
+        for remote in remotes:
+            remote.send(("get_attr", attr_name))
+        return [remote.recv() for remote in remotes]
+
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None):
+        remotes = [self.remotes[i] for i in self._get_indices(indices)]
+        for remote in remotes:
+            remote.send(("set_attr", (attr_name, value)))
+        for remote in remotes:
+            remote.recv()
+
+    def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> list[Any]:
+        if method_name == "action_masks" and "action_masks" in self._arrays:
+            # the masks are already in shared memory, see sb3_contrib.common.maskable.utils.get_action_masks
+            return list(self._arrays["action_masks"][list(self._get_indices(indices))])
+        remotes = [self.remotes[i] for i in self._get_indices(indices)]
+        for remote in remotes:
+            remote.send(("env_method", (method_name, method_args, method_kwargs)))
+        return [remote.recv() for remote in remotes]
+
+    def env_is_wrapped(self, wrapper_class, indices: VecEnvIndices = None) -> list[bool]:
+        return [False for _ in self._get_indices(indices)]
+
+    def get_images(self):
+        raise NotImplementedError
+
+
+def make_skat_env(
+        config: TrainingConfig,
+        position: PlayerPosition,
+        predecessor: tuple[type, dict],
+        successor: tuple[type, dict],
+        seed: Optional[int],
+        index: int,
+) -> SkatEnv:
+    """
+    Creates the environment of worker index with its own players, given by class and kwargs. Seeded players get
+    independent seeds for each worker.
+    """
+    other_players: list[Player] = [player_class(**kwargs) for player_class, kwargs in (predecessor, successor)]
+    if seed is not None:
+        for player in other_players:
+            player.seed_random(game_seed(seed, index))
+    return SkatEnv(position, other_players[0], other_players[1], config.observer(**config.observer_kwargs),
+                   config.trump_strategy(), flat_observation=config.flat_observation)
@@ -25,7 +25,9 @@ class TrainingConfig:
         observer: Type[ModelObserver],
         observer_kwargs: dict,
         trump_strategy: Type[TrumpStrategy],
-        name: Optional[str] = None
+        name: Optional[str] = None,
+        # the observations are flat vectors (see BasicModelObserver.flat_encoder) instead of dicts
+        flat_observation=False,
     ):
         self.algorithm = algorithm
         self.policy = policy
@@ -34,6 +36,7 @@ class TrainingConfig:
         self.observer_kwargs = observer_kwargs
         self.trump_strategy = trump_strategy
         self.name = name
+        self.flat_observation = flat_observation
 
     def __str__(self):
         return self.name
@@ -0,0 +1,211 @@
+import hashlib
+import os
+import pickle
+import socket
+import time
+import traceback
+from typing import Iterator, Optional
+
+import numpy as np
+
+from players import Player
+from game_results import RESULT_DTYPE
+from result_cache import matchup_key
+from skat_statistics import play_runs
+
+# a claimed chunk is given back to the queue if its worker has not shown a sign of life for this many seconds
+CLAIM_TIMEOUT = 600
+
+
+class WorkQueue:
+    """
+    A queue of game chunks in a directory, which can be shared by several hosts. Each chunk descriptor holds the
+    players, the seed and the runs to play. Workers claim descriptors by moving them from pending to claimed, which is
+    atomic, and drop the results as a RESULT_DTYPE array in results, where the coordinator collects them.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        for subdirectory in ("pending", "claimed", "results", "failed"):
+            os.makedirs(f"{directory}/{subdirectory}", exist_ok=True)
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        # players of the descriptors this process has worked on, by their pickled specs
+        self._players: dict[bytes, list[Player]] = {}
+
+    def _path(self, subdirectory: str, chunk_id: str, extension=".chunk") -> str:
+        return f"{self.directory}/{subdirectory}/{chunk_id}{extension}"
+
+    def _write_atomic(self, filename: str, write):
+        temp_filename = f"{filename}.{self.worker_id}.tmp"
+        with open(temp_filename, "wb") as file:
+            write(file)
+        os.replace(temp_filename, filename)
+
+    def submit(self, soloist: Player, opponents: list[Player], seed: int, runs: list[int], bitboard=False,
+               chunk_size=100) -> list[str]:
+        """
+        Adds the runs of the players in chunks to the queue. Chunks that are already queued, claimed or finished are not
+        added again, so a coordinator can submit the same runs again after a restart.
+        :returns: The ids of the chunks in the order of the runs.
+        """
+        matchup = matchup_key(soloist, opponents, seed)
+        player_specs = [(player.__class__, player.kwargs) for player in (soloist, *opponents)]
+        chunk_ids = []
+        for i in range(0, len(runs), chunk_size):
+            chunk_runs = runs[i:i + chunk_size]
+            chunk_id = f"{matchup[:16]}-{chunk_runs[0]:08d}-{hashlib.sha256(repr(chunk_runs).encode()).hexdigest()[:8]}"
+            chunk_ids.append(chunk_id)
+            if not any(os.path.exists(path) for path in (
+                    self._path("pending", chunk_id), self._path("claimed", chunk_id),
+                    self._path("results", chunk_id, ".npy"))):
+                descriptor = dict(players=player_specs, seed=seed, runs=chunk_runs, bitboard=bitboard)
+                # a chunk that failed before is tried again
+                if os.path.exists(self._path("failed", chunk_id, ".txt")):
+                    os.remove(self._path("failed", chunk_id, ".txt"))
+                self._write_atomic(self._path("pending", chunk_id), lambda file: pickle.dump(descriptor, file))
+        return chunk_ids
+
+    def claim(self) -> Optional[str]:
+        """:returns: The id of a pending chunk that now belongs to this worker, or None if no chunk is pending."""
+        for filename in sorted(os.listdir(f"{self.directory}/pending")):
+            if not filename.endswith(".chunk"):
+                continue
+            chunk_id = filename[:-len(".chunk")]
+            try:
+                os.rename(self._path("pending", chunk_id), self._path("claimed", chunk_id))
+            except FileNotFoundError:
+                # another worker was faster
+                continue
+            return chunk_id
+        return None
+
+    def work_on(self, chunk_id: str):
+        """
+        Plays a claimed chunk and writes its results. If the claim is lost, because it was given back to the queue
+        after a stall of the worker, the work on the chunk stops without a result, the next claim of it plays it again.
+        """
+        claim_filename = self._path("claimed", chunk_id)
+        try:
+            with open(claim_filename, "rb") as file:
+                descriptor = pickle.load(file)
+        except FileNotFoundError:
+            return
+        key = pickle.dumps(descriptor["players"])
+        if key not in self._players:
+            self._players[key] = [player_class(**kwargs) for player_class, kwargs in descriptor["players"]]
+        players = self._players[key]
+        try:
+            results = np.zeros(len(descriptor["runs"]), dtype=RESULT_DTYPE)
+            for i, result in enumerate(play_runs(players[0], players[1:], descriptor["runs"], descriptor["seed"],
+                                                 bitboard=descriptor["bitboard"])):
+                results[i] = result
+                # the modification time of the claim shows that the worker is still alive
+                try:
+                    os.utime(claim_filename)
+                except FileNotFoundError:
+                    return
+        except Exception:
+            # the coordinator raises the error when it collects the chunk, the claim is released
+            with open(self._path("failed", chunk_id, ".txt"), "w") as file:
+                file.write(f"{self.worker_id}\n{traceback.format_exc()}")
+            try:
+                os.remove(claim_filename)
+            except FileNotFoundError:
+                pass
+            raise
+        if not os.path.exists(claim_filename):
+            return
+        self._write_atomic(self._path("results", chunk_id, ".npy"), lambda file: np.save(file, results))
+        try:
+            os.remove(claim_filename)
+        except FileNotFoundError:
+            # the claim was given back to the queue after the results were written, the chunk is played twice
+            pass
+
+    def work(self, poll_interval=1.0, exit_when_empty=False):
+        """
+        Claims and plays chunks until the queue is empty (if exit_when_empty) or forever. A failing chunk is reported
+        to the coordinator and does not stop the worker. Idle workers give chunks of dead workers back to the queue.
+        """
+        while True:
+            chunk_id = self.claim()
+            if chunk_id is not None:
+                try:
+                    self.work_on(chunk_id)
+                except Exception:
+                    traceback.print_exc()
+                    print(f"Chunk {chunk_id} failed, continuing with the next chunk")
+            elif exit_when_empty:
+                return
+            else:
+                self.requeue_stale_claims()
+                time.sleep(poll_interval)
+
+    def requeue_stale_claims(self, timeout=CLAIM_TIMEOUT):
+        """Gives chunks back to the queue whose workers have not updated their claims for timeout seconds."""
+        for filename in os.listdir(f"{self.directory}/claimed"):
+            path = f"{self.directory}/claimed/{filename}"
+            try:
+                if time.time() - os.path.getmtime(path) > timeout:
+                    os.rename(path, f"{self.directory}/pending/{filename}")
+            except FileNotFoundError:
+                pass
+
+    def collect(self, chunk_ids: list[str], poll_interval=1.0) -> Iterator[np.ndarray]:
+        """
+        Waits for the results of the chunks and removes them from the queue.
+        :returns: The results of each chunk in the given order.
+        """
+        for chunk_id in chunk_ids:
+            result_filename = self._path("results", chunk_id, ".npy")
+            while not os.path.isfile(result_filename):
+                failed_filename = self._path("failed", chunk_id, ".txt")
+                if os.path.isfile(failed_filename):
+                    with open(failed_filename) as file:
+                        raise RuntimeError(f"Chunk {chunk_id} failed on worker {file.read()}")
+                self.requeue_stale_claims()
+                time.sleep(poll_interval)
+            results = np.load(result_filename)
+            os.remove(result_filename)
+            yield results
+
+    def play_runs(self, soloist: Player, opponents: list[Player], runs: list[int], seed: int, bitboard=False
+                  ) -> Iterator[tuple]:
+        """Like skat_statistics.play_runs, but the runs are played by the workers of the queue."""
+        chunk_ids = self.submit(soloist, opponents, seed, runs, bitboard)
+        try:
+            for results in self.collect(chunk_ids):
+                yield from results.tolist()
+        finally:
+            # chunks that are still pending when the caller stops early are not needed anymore
+            self.withdraw(chunk_ids)
+
+    def withdraw(self, chunk_ids: list[str]):
+        """
+        Removes the chunks from the queue that no worker has claimed yet. Results of chunks that finish after the caller
+        stopped collecting stay in the results directory, where a later submit of the same runs finds them.
+        """
+        for chunk_id in chunk_ids:
+            try:
+                os.remove(self._path("pending", chunk_id))
+            except FileNotFoundError:
+                pass
+
+
+def main():
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Play game chunks from a shared work queue directory",
+                            prog="python -m work_queue")
+    parser.add_argument("directory", type=str, help="the queue directory, shared by the coordinator and all workers")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="seconds to wait before looking for new chunks again (default: 1)")
+    parser.add_argument("--exit-when-empty", action='store_true',
+                        help="set flag to stop once no chunk is pending instead of waiting for new chunks")
+
+    args = parser.parse_args()
+    WorkQueue(args.directory).work(args.poll_interval, args.exit_when_empty)
+
+
+if __name__ == "__main__":
+    main()